@@ -0,0 +1,107 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from utils import get_ai_advisor_response
+
+ADVISOR_BACKEND = os.environ.get("ADVISOR_BACKEND", "stub")
+# Seconds allowed for a whole reply, and between two chunks of it
+ADVISOR_TIMEOUT = float(os.environ.get("ADVISOR_TIMEOUT", 60))
+ADVISOR_CHUNK_TIMEOUT = float(os.environ.get("ADVISOR_CHUNK_TIMEOUT", 15))
+# Replies generated at once in this process; further requests wait briefly, then get "busy"
+ADVISOR_MAX_CONCURRENT = int(os.environ.get("ADVISOR_MAX_CONCURRENT", 4))
+ADVISOR_QUEUE_SECONDS = float(os.environ.get("ADVISOR_QUEUE_SECONDS", 2))
+
+class AdvisorBusy(Exception):
+    """Every advisor slot in this process is in use."""
+
+class AdvisorTimeout(Exception):
+    """The backend took too long to produce the reply."""
+
+class AdvisorBackend:
+    """Something that can write the advisor's reply to a message, a chunk at a time."""
+
+    def stream(self, message, context=None):
+        """Yield the reply to `message` as successive pieces of text.
+
+        context is plain data built in the request (never ORM objects), since
+        backends run outside the request thread.
+        """
+        raise NotImplementedError
+
+class StubAdvisorBackend(AdvisorBackend):
+    """Local backend with canned replies, streamed word by word. Used in development and tests."""
+
+    def __init__(self, delay=None):
+        self.delay = float(os.environ.get("ADVISOR_STUB_DELAY", 0.03)) if delay is None else delay
+
+    def stream(self, message, context=None):
+        for word in re.findall(r'\S+\s*', get_ai_advisor_response(message)):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word
+
+ADVISOR_BACKENDS = {
+    'stub': StubAdvisorBackend,
+}
+
+_backend = None
+_slots = threading.BoundedSemaphore(ADVISOR_MAX_CONCURRENT)
+_done = object()
+
+def get_advisor_backend():
+    """The configured backend, created on first use."""
+    global _backend
+    if _backend is None:
+        _backend = ADVISOR_BACKENDS[ADVISOR_BACKEND]()
+    return _backend
+
+def _produce(chunks, message, context, backend):
+    try:
+        for chunk in backend.stream(message, context):
+            chunks.put(chunk)
+    except Exception as e:
+        chunks.put(e)
+    finally:
+        chunks.put(_done)
+        _slots.release()
+
+def _read_chunks(chunks):
+    deadline = time.monotonic() + ADVISOR_TIMEOUT
+    while True:
+        remaining = min(deadline - time.monotonic(), ADVISOR_CHUNK_TIMEOUT)
+        try:
+            chunk = chunks.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            raise AdvisorTimeout()
+        if chunk is _done:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+def stream_reply(message, context=None, backend=None):
+    """Start generating a reply and return an iterator over its chunks.
+
+    Raises AdvisorBusy if no advisor slot frees up in time. The backend runs
+    in its own thread, which holds the slot until the backend finishes, so
+    a stalled model call can neither hold the request past the deadline
+    (iteration raises AdvisorTimeout) nor exceed the concurrency limit.
+    """
+    if not _slots.acquire(timeout=ADVISOR_QUEUE_SECONDS):
+        raise AdvisorBusy()
+    chunks = queue.Queue()
+    try:
+        threading.Thread(
+            target=_produce, args=(chunks, message, context, backend or get_advisor_backend()), daemon=True
+        ).start()
+    except Exception:
+        _slots.release()
+        raise
+    return _read_chunks(chunks)
+
+def format_event(name, data):
+    """One server-sent event carrying `data` as JSON."""
+    return 'event: %s\ndata: %s\n\n' % (name, json.dumps(data))
@@ -0,0 +1,145 @@
+import json
+import os
+import re
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import AiChatMessage, AdvisorSummary
+
+# Recent messages kept word for word, and the prompt budget they share with the rest
+CONTEXT_RECENT_MESSAGES = int(os.environ.get("ADVISOR_CONTEXT_MESSAGES", 10))
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("ADVISOR_CONTEXT_TOKENS", 1500))
+SUMMARY_TOKEN_BUDGET = 300
+PROFILE_TOKEN_BUDGET = 200
+SUMMARY_NOTE_CHARS = 160
+
+# Profile fields the advisor is told about, with their labels
+PROFILE_FIELDS = [
+    ('career_objective', 'Career objective'),
+    ('skills', 'Skills'),
+    ('areas_of_interest', 'Areas of interest'),
+    ('higher_education', 'Education'),
+]
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1 if text else 0
+
+def _truncate(text, tokens):
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+class ConversationContext:
+    """A user's rolling summary plus their most recent messages, as read from the database."""
+
+    __slots__ = ('user_id', 'summary', 'summarized_through_id', 'recent', 'stored')
+
+    def __init__(self, user_id, summary, summarized_through_id, recent, stored):
+        self.user_id = user_id
+        self.summary = summary
+        self.summarized_through_id = summarized_through_id
+        self.recent = recent
+        self.stored = stored  # whether the user has an AdvisorSummary row yet
+
+    def recent_tokens(self):
+        return sum(estimate_tokens(text) for _, _, text in self.recent)
+
+def _note(is_user, text):
+    """One summary note for a message leaving the recent window."""
+    first_sentence = re.split(r'(?<=[.?!])\s', text.strip(), maxsplit=1)[0]
+    return '%s: %s' % ('User asked' if is_user else 'Advisor said', first_sentence[:SUMMARY_NOTE_CHARS])
+
+def _fold_into_summary(context, evicted):
+    """Add notes for evicted messages, dropping the oldest notes to stay within budget."""
+    context.summary.extend(_note(is_user, text) for _, is_user, text in evicted)
+    while context.summary and sum(estimate_tokens(note) for note in context.summary) > SUMMARY_TOKEN_BUDGET:
+        context.summary.pop(0)
+    context.summarized_through_id = evicted[-1][0]
+
+def _history_budget():
+    return CONTEXT_TOKEN_BUDGET - SUMMARY_TOKEN_BUDGET - PROFILE_TOKEN_BUDGET
+
+def get_conversation_context(user_id, window=CONTEXT_RECENT_MESSAGES):
+    """The user's summary and newest `window` messages not yet folded into it."""
+    # Columns rather than the entity, so a row another worker just advanced is never read stale
+    row = db.session.execute(
+        select(AdvisorSummary.summary, AdvisorSummary.summarized_through_id)
+        .where(AdvisorSummary.user_id == user_id)
+    ).first()
+    summary = json.loads(row.summary) if row and row.summary else []
+    summarized_through_id = row.summarized_through_id if row else 0
+    # Only the newest window is read; anything older that was never summarized is skipped
+    messages = db.session.execute(
+        select(AiChatMessage.id, AiChatMessage.is_user, AiChatMessage.message)
+        .where(AiChatMessage.user_id == user_id, AiChatMessage.id > summarized_through_id)
+        .order_by(AiChatMessage.id.desc()).limit(window)
+    ).all()
+    recent = [tuple(m) for m in reversed(messages)]
+    return ConversationContext(user_id, summary, summarized_through_id, recent, row is not None)
+
+def record_message(message):
+    """Fold whatever a saved AiChatMessage pushes out of the recent window into the summary.
+
+    The summary row is the only state shared between workers and only moves
+    forward: it is updated on condition that nobody advanced it since it was
+    read, so a worker with an outdated view changes nothing. The caller commits.
+    """
+    # One more than the window, so the message this one pushes out is seen too
+    context = get_conversation_context(message.user_id, CONTEXT_RECENT_MESSAGES + 1)
+
+    evicted = []
+    while len(context.recent) > CONTEXT_RECENT_MESSAGES or (
+            len(context.recent) > 1 and context.recent_tokens() > _history_budget()):
+        evicted.append(context.recent.pop(0))
+    if not evicted:
+        return
+
+    read_through_id = context.summarized_through_id
+    _fold_into_summary(context, evicted)
+    values = {'summary': json.dumps(context.summary), 'summarized_through_id': context.summarized_through_id}
+    if context.stored:
+        db.session.execute(
+            update(AdvisorSummary)
+            .where(AdvisorSummary.user_id == message.user_id,
+                   AdvisorSummary.summarized_through_id == read_through_id)
+            .values(**values)
+        )
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(AdvisorSummary(user_id=message.user_id, **values))
+    except IntegrityError:
+        # Another worker summarized this conversation first
+        pass
+
+def build_advisor_context(user, profile=None):
+    """Plain-data prompt context for the advisor backend: profile, summary and recent history.
+
+    Stays within CONTEXT_TOKEN_BUDGET however long the conversation is.
+    """
+    profile_lines = []
+    if user.major:
+        profile_lines.append('Major: %s' % user.major)
+    for field, label in PROFILE_FIELDS:
+        value = getattr(profile, field, None) if profile else None
+        if value:
+            profile_lines.append('%s: %s' % (label, value))
+    profile_text = _truncate('\n'.join(profile_lines), PROFILE_TOKEN_BUDGET)
+
+    context = get_conversation_context(user.id)
+    history, used = [], 0
+    for _, is_user, text in reversed(context.recent):
+        text = _truncate(text, _history_budget())
+        used += estimate_tokens(text)
+        if history and used > _history_budget():
+            break
+        history.append({'role': 'user' if is_user else 'advisor', 'text': text})
+    history.reverse()
+
+    summary_text = '\n'.join(context.summary)
+    return {
+        'profile': profile_text,
+        'summary': summary_text,
+        'history': history,
+        'tokens': estimate_tokens(profile_text) + estimate_tokens(summary_text) + used,
+    }
@@ -17,7 +17,7 @@ db = SQLAlchemy(model_class=Base)
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "career_compass_secret_key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)  # needed for url_for to generate with https
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)  # needed for url_for to generate with https, and the client address for sign-in limits
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///career_compass.db")
@@ -40,15 +40,21 @@ with app.app_context():
     # Import the models here
     import models
     from routes import configure_routes
+    from commands import configure_commands
+    from migrations import check_schema
+    from query_budget import configure_query_budget
     
-    # Create database tables
-    db.create_all()
+    # Apply pending migrations (one version query when the schema is already current)
+    check_schema()
     
-    # Configure routes
+    # Configure routes and CLI commands
     configure_routes(app)
+    configure_commands(app)
+    configure_query_budget(app)
 
-    from models import User
+    from user_cache import load_cached_user
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Cached per process for a few seconds; the profile comes along in the same query
+        return load_cached_user(int(user_id))
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+from app import db
+from models import CacheVersion, CareerPath, AptitudeTest, CodingProblem
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# How stale another worker's view of the catalog versions may get, in seconds
+CATALOG_CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", 1))
+
+def snapshot(obj, **extra):
+    """Read-only copy of a row's column values, safe to share between requests."""
+    values = {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+class VersionedCache:
+    """Per-process cache of values built from catalogs, dropped when a catalog's version moves.
+
+    Versions live in the cache_version table, so a write through any worker
+    invalidates every worker's copy within CATALOG_CHECK_INTERVAL.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self._versions = {}
+        self._modified = {}
+        self._checked_at = None
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def versions(self):
+        """Current catalog versions, read from the database at most once per check interval."""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            try:
+                rows = db.session.query(CacheVersion.name, CacheVersion.version, CacheVersion.updated_at).all()
+            except SQLAlchemyError:
+                # Table not created yet: treat everything as changed
+                db.session.rollback()
+                rows = []
+                now = None
+            with self._lock:
+                self._versions = {name: version for name, version, _ in rows}
+                self._modified = {name: updated_at for name, _, updated_at in rows}
+                self._checked_at = now
+        return self._versions
+
+    def version(self, name):
+        return self.versions().get(name, 0)
+
+    def last_modified(self, names):
+        """When the most recently changed of the named catalogs last changed, if known."""
+        self.versions()
+        modified = [self._modified[name] for name in names if self._modified.get(name)]
+        return max(modified) if modified else None
+
+    def get(self, name, loader, key=None):
+        """Return the cached value for (name, key), calling loader() if catalog `name` changed.
+
+        Concurrent misses for the same entry wait for a single load.
+        """
+        version = self.version(name)
+        entry = self._entries.get((name, key))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with self._lock:
+            loading = self._loading.setdefault((name, key), threading.Lock())
+        with loading:
+            entry = self._entries.get((name, key))
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            value = loader()
+            with self._lock:
+                self._entries[(name, key)] = (version, value)
+        return value
+
+    def expire_versions(self):
+        """Re-read versions on the next lookup instead of waiting for the interval."""
+        self._checked_at = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._checked_at = None
+
+catalog_cache = VersionedCache(CATALOG_CHECK_INTERVAL)
+
+@event.listens_for(Session, 'after_commit')
+def _expire_after_local_change(session):
+    # This worker's own writes should show up immediately, not after the interval
+    if session.info.pop('changed_catalogs', None):
+        catalog_cache.expire_versions()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_change(session):
+    session.info.pop('changed_catalogs', None)
+
+def get_career_paths():
+    """All career paths, with their skill tags, as cached records."""
+    def load():
+        return tuple(
+            snapshot(path, skill_tags=tuple(snapshot(skill) for skill in path.skill_tags))
+            for path in CareerPath.query.order_by(CareerPath.id)
+        )
+    return catalog_cache.get('career_paths', load)
+
+def get_career_path_choices():
+    """Choices for CareerGoalForm.career_path_id."""
+    return [(0, 'Custom Goal')] + [(path.id, path.name) for path in get_career_paths()]
+
+def get_aptitude_test(test_id):
+    """The cached record for one aptitude test, or None."""
+    return next((test for test in get_aptitude_tests() if test.id == test_id), None)
+
+def get_aptitude_tests():
+    """All aptitude tests in listing order, as cached records."""
+    def load():
+        return tuple(snapshot(test) for test in AptitudeTest.query.order_by(AptitudeTest.created_at, AptitudeTest.id))
+    return catalog_cache.get('aptitude_tests', load)
+
+def get_coding_problems():
+    """All coding problems in listing order, as cached records."""
+    def load():
+        return tuple(snapshot(problem) for problem in CodingProblem.query.order_by(CodingProblem.created_at, CodingProblem.id))
+    return catalog_cache.get('coding_problems', load)
@@ -0,0 +1,113 @@
+import json
+import click
+from app import db
+from models import User, PasswordResetToken, CareerPath, CodingProblem, AptitudeTest, AptitudeQuestion
+from item_analysis import update_item_statistics
+from migrations import all_migrations, current_version, upgrade
+from query_plans import route_urls, capture_route_statements, explain, full_scans
+from utils import (
+    get_career_paths_sample_data, get_coding_problems_sample_data,
+    get_aptitude_test_sample_data
+)
+
+def seed_sample_data():
+    """Load the sample career paths, coding problems and aptitude tests in one transaction."""
+    objects = [CareerPath(**path_data) for path_data in get_career_paths_sample_data()]
+    objects += [CodingProblem(**problem_data) for problem_data in get_coding_problems_sample_data()]
+
+    for category, test_data in get_aptitude_test_sample_data().items():
+        test = AptitudeTest(
+            category=category.replace('_', ' ').title(),
+            description=test_data['description'],
+            total_questions=test_data['total_questions'],
+            time_limit=test_data['time_limit'],
+            passing_score=test_data['passing_score']
+        )
+        # Questions are linked through the relationship, so no flush is needed for test ids
+        test.questions = [
+            AptitudeQuestion(
+                question_text=q_data['question_text'],
+                options=json.dumps(q_data['options']),
+                correct_option=q_data['correct_option'],
+                explanation=q_data['explanation']
+            )
+            for q_data in test_data['questions']
+        ]
+        objects.append(test)
+
+    db.session.add_all(objects)
+    db.session.commit()
+
+def configure_commands(app):
+
+    @app.cli.command('seed')
+    @click.option('--force', is_flag=True, help='Seed even if sample data is already present.')
+    def seed(force):
+        """Load sample career paths, coding problems and aptitude tests."""
+        if not force and CareerPath.query.first() is not None:
+            click.echo('Database already has data; use --force to seed anyway.')
+            return
+        seed_sample_data()
+        click.echo('Sample data loaded.')
+
+    @app.cli.command('item-analysis')
+    @click.option('--test-id', type=int, help='Only update this aptitude test.')
+    @click.option('--rebuild', is_flag=True, help='Recompute from all results instead of only new ones.')
+    def item_analysis(test_id, rebuild):
+        """Fold new aptitude test results into the item statistics."""
+        added = update_item_statistics(test_id=test_id, rebuild=rebuild)
+        click.echo('Added %d results to item statistics.' % added)
+
+    @app.cli.command('migrate')
+    @click.option('--target', type=int, help='Stop after this migration version.')
+    def migrate(target):
+        """Apply pending schema migrations."""
+        applied = upgrade(target)
+        for migration in applied:
+            click.echo('Applied %04d %s' % (migration.version, migration.name))
+        click.echo('Schema is at version %s.' % current_version())
+
+    @app.cli.command('migration-status')
+    def migration_status():
+        """List migrations and whether each has been applied."""
+        version = current_version() or 0
+        for migration in all_migrations():
+            click.echo('%04d %-30s %s' % (migration.version, migration.name, 'applied' if migration.version <= version else 'pending'))
+
+    @app.cli.command('sweep-reset-tokens')
+    def sweep_reset_tokens():
+        """Delete expired password reset tokens."""
+        removed = PasswordResetToken.sweep_expired()
+        db.session.commit()
+        click.echo('Removed %d expired reset tokens.' % removed)
+
+    @app.cli.command('set-admin')
+    @click.argument('email')
+    @click.option('--revoke', is_flag=True, help='Remove admin access instead of granting it.')
+    def set_admin(email, revoke):
+        """Grant or revoke admin access for a user."""
+        user = User.find_by_email(email)
+        if user is None:
+            raise click.ClickException('No user with email %s.' % email)
+        user.is_admin = not revoke
+        db.session.commit()
+        click.echo('%s is %s an admin.' % (email, 'no longer' if revoke else 'now'))
+
+    @app.cli.command('check-query-plans')
+    @click.option('--email', required=True, help='User whose pages are requested.')
+    @click.option('--url', 'urls', multiple=True, help='Page to check (repeatable); defaults to every GET page without URL arguments.')
+    def check_query_plans(email, urls):
+        """EXPLAIN every query the pages run and fail on full scans of per-user history tables."""
+        user = User.find_by_email(email)
+        if user is None:
+            raise click.ClickException('No user with email %s.' % email)
+        statements = capture_route_statements(app, user.id, urls or route_urls(app))
+        failures = 0
+        for statement, (url, parameters) in statements.items():
+            scanned = full_scans(explain(statement, parameters))
+            if scanned:
+                failures += 1
+                click.echo('%s: full scan of %s in\n    %s' % (url, ', '.join(scanned), ' '.join(statement.split())))
+        if failures:
+            raise click.ClickException('%d of %d queries scan a history table.' % (failures, len(statements)))
+        click.echo('Checked %d queries; no full scans of history tables.' % len(statements))
@@ -0,0 +1,83 @@
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, make_response, render_template, request, session
+from flask_login import current_user
+from markupsafe import Markup
+from sqlalchemy import inspect
+from catalog import catalog_cache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+def _template_token():
+    """Changes whenever a template is edited, so a deploy never revalidates old pages."""
+    parts = []
+    for root, _, files in os.walk(TEMPLATE_DIR):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            parts.append('%s:%d' % (os.path.relpath(path, TEMPLATE_DIR), os.stat(path).st_mtime_ns))
+    return hashlib.sha1('|'.join(sorted(parts)).encode('utf-8')).hexdigest()
+
+TEMPLATE_TOKEN = _template_token()
+
+def _user_state():
+    """The logged-in user's own rows, which the layout and some pages render."""
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    rows = [current_user._get_current_object(), current_user.profile]
+    return repr([
+        sorted((attr.key, getattr(row, attr.key)) for attr in inspect(type(row)).column_attrs)
+        for row in rows if row is not None
+    ])
+
+def page_etag(catalogs, user_state=None):
+    """ETag for the current URL as rendered for the current user from `catalogs`.
+
+    user_state() returns what else of the user's own the page shows.
+    """
+    parts = [TEMPLATE_TOKEN, request.full_path, _user_state()]
+    if user_state is not None:
+        parts.append(user_state())
+    parts += ['%s:%d' % (name, catalog_cache.version(name)) for name in catalogs]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def conditional_page(*catalogs, user_state=None):
+    """Answer a repeat GET of a page built from `catalogs` with 304 Not Modified.
+
+    Only If-None-Match is honoured: Last-Modified is sent for information,
+    but the ETag also covers the URL and the user's own rows, including
+    any extra ones described by user_state() (see page_etag).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Flashed messages are shown once, so that response has to be rendered
+            if request.method != 'GET' or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            etag = page_etag(catalogs, user_state)
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                last_modified = catalog_cache.last_modified(catalogs)
+                if last_modified:
+                    response.last_modified = last_modified
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def cached_fragment(catalog, key, template_name, load_context):
+    """Rendered template_name, cached until `catalog` changes.
+
+    Only for markup that is the same for every user; load_context() is
+    called on a miss to build the template context.
+    """
+    def render():
+        return Markup(render_template(template_name, **load_context()))
+    return catalog_cache.get(catalog, render, key=('fragment', template_name, key))
@@ -0,0 +1,155 @@
+import json
+import math
+from collections import Counter, namedtuple
+from itertools import compress
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import AptitudeTestResult, AptitudeTestStats, AptitudeQuestionStats
+from catalog import get_aptitude_tests
+from question_bank import get_question_bank, encode_answers, encode_correct, UNANSWERED_BYTE
+
+HISTOGRAM_BINS = 10
+ANALYSIS_BATCH_SIZE = 5000
+
+QuestionReport = namedtuple('QuestionReport', 'question p_value discrimination options unanswered')
+OptionReport = namedtuple('OptionReport', 'text count share is_correct')
+
+def _histogram_bin(percentage):
+    return min(int((percentage or 0) * HISTOGRAM_BINS // 100), HISTOGRAM_BINS - 1)
+
+def _result_batches(test_id, after_id, batch_size):
+    """Plain result rows (no ORM objects) newer than after_id, in id order."""
+    while True:
+        rows = db.session.query(
+            AptitudeTestResult.id, AptitudeTestResult.score_percentage,
+            AptitudeTestResult.answer_bytes, AptitudeTestResult.correct_bytes, AptitudeTestResult.question_ids,
+            AptitudeTestResult.answers
+        ).filter(
+            AptitudeTestResult.test_id == test_id, AptitudeTestResult.id > after_id
+        ).order_by(AptitudeTestResult.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+def _answer_matrices(bank, rows):
+    """Answer and correctness matrices for a batch, one bytes row per result, in the bank's question order."""
+    answers, correct = [], []
+    for row in rows:
+        if row.answer_bytes is None or row.correct_bytes is None:
+            # Not yet backfilled: decode the legacy JSON
+            selected = bank.selected_answers(row)
+            answers.append(encode_answers(selected))
+            correct.append(encode_correct(bank.correct(selected)))
+        else:
+            answers.append(bank.align(row.answer_bytes, row.question_ids, UNANSWERED_BYTE))
+            correct.append(bank.align(row.correct_bytes, row.question_ids, 0))
+    return answers, correct
+
+def _reset(test_id, bank, question_ids):
+    """Start a test's statistics over, e.g. after its questions changed."""
+    AptitudeQuestionStats.query.filter_by(test_id=test_id).delete(synchronize_session=False)
+    for position, question in enumerate(bank.questions):
+        db.session.add(AptitudeQuestionStats(
+            question_id=question.id, test_id=test_id, position=position,
+            option_counts=json.dumps([0] * len(question.options))
+        ))
+    stats = db.session.get(AptitudeTestStats, test_id)
+    if stats is None:
+        stats = AptitudeTestStats(test_id=test_id)
+        db.session.add(stats)
+    stats.question_ids = question_ids
+    stats.last_result_id = stats.results_count = stats.score_sum = stats.score_sq_sum = 0
+    stats.score_histogram = json.dumps([0] * HISTOGRAM_BINS)
+    db.session.commit()
+    return stats
+
+def _update_test(test_id, batch_size, rebuild):
+    bank = get_question_bank(test_id)
+    stats = db.session.get(AptitudeTestStats, test_id)
+    if rebuild or stats is None or stats.question_ids != bank.layout:
+        try:
+            stats = _reset(test_id, bank, bank.layout)
+        except IntegrityError:
+            # Another run is resetting the same test
+            db.session.rollback()
+            return 0
+    question_stats = AptitudeQuestionStats.query.filter_by(test_id=test_id).order_by(AptitudeQuestionStats.position).all()
+
+    processed = 0
+    for rows in _result_batches(test_id, stats.last_result_id, batch_size):
+        answers, correct = _answer_matrices(bank, rows)
+        scores = list(map(sum, correct))
+
+        histogram = json.loads(stats.score_histogram)
+        for band, count in Counter(_histogram_bin(row.score_percentage) for row in rows).items():
+            histogram[band] += count
+
+        # Only one run may fold in a given range of results
+        claimed = AptitudeTestStats.query.filter_by(
+            test_id=test_id, last_result_id=stats.last_result_id
+        ).update({
+            'last_result_id': rows[-1].id,
+            'results_count': stats.results_count + len(rows),
+            'score_sum': stats.score_sum + sum(scores),
+            'score_sq_sum': stats.score_sq_sum + sum(score * score for score in scores),
+            'score_histogram': json.dumps(histogram),
+        }, synchronize_session=False)
+        if not claimed:
+            db.session.rollback()
+            break
+
+        # Column scans over the batch: one pass per question
+        for item, answer_column, correct_column in zip(question_stats, zip(*answers), zip(*correct)):
+            option_counts = json.loads(item.option_counts)
+            for option, count in Counter(answer_column).items():
+                if option < len(option_counts):
+                    option_counts[option] += count
+            item.option_counts = json.dumps(option_counts)
+            item.answered_count += len(answer_column) - answer_column.count(UNANSWERED_BYTE)
+            item.correct_count += sum(correct_column)
+            item.correct_score_sum += sum(compress(scores, correct_column))
+
+        db.session.commit()
+        db.session.refresh(stats)
+        processed += len(rows)
+    return processed
+
+def update_item_statistics(test_id=None, batch_size=ANALYSIS_BATCH_SIZE, rebuild=False):
+    """Fold results added since the last run into the item statistics; returns how many were added."""
+    test_ids = [test_id] if test_id is not None else [test.id for test in get_aptitude_tests()]
+    return sum(_update_test(tid, batch_size, rebuild) for tid in test_ids)
+
+def item_report(test_id):
+    """Per-question p-values, discrimination and option distributions, plus the score histogram.
+
+    Discrimination is the point-biserial correlation between getting the
+    question right and the total score; it is None when undefined.
+    """
+    bank = get_question_bank(test_id)
+    stats = db.session.get(AptitudeTestStats, test_id)
+    if stats is None or not stats.results_count:
+        return [], [0] * HISTOGRAM_BINS, 0
+
+    n = stats.results_count
+    mean = stats.score_sum / n
+    sd = math.sqrt(max(stats.score_sq_sum / n - mean * mean, 0))
+    items = {item.question_id: item for item in AptitudeQuestionStats.query.filter_by(test_id=test_id)}
+
+    reports = []
+    for question in bank.questions:
+        item = items.get(question.id)
+        if item is None:
+            continue
+        p_value = item.correct_count / n
+        discrimination = None
+        if sd and 0 < item.correct_count < n:
+            mean_correct = item.correct_score_sum / item.correct_count
+            mean_incorrect = (stats.score_sum - item.correct_score_sum) / (n - item.correct_count)
+            discrimination = (mean_correct - mean_incorrect) / sd * math.sqrt(p_value * (1 - p_value))
+        options = [
+            OptionReport(text, count, count / n, index == question.correct_option)
+            for index, (text, count) in enumerate(zip(question.options, json.loads(item.option_counts)))
+        ]
+        reports.append(QuestionReport(question, p_value, discrimination, options, n - item.answered_count))
+    return reports, json.loads(stats.score_histogram), n
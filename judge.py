@@ -0,0 +1,319 @@
+import json
+import logging
+import math
+import os
+import pwd
+import queue
+import re
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from judge_sandbox import (
+    ACCEPTED, WRONG_ANSWER, RUNTIME_ERROR, TIME_LIMIT_EXCEEDED, WORKER_ERROR_STATUSES, normalize_result
+)
+
+logger = logging.getLogger(__name__)
+
+# Limits applied to every submission. They can be tuned per deployment
+# without touching the code.
+JUDGE_POOL_SIZE = int(os.environ.get("JUDGE_POOL_SIZE", 2))
+JUDGE_CPU_SECONDS = int(os.environ.get("JUDGE_CPU_SECONDS", 2))
+JUDGE_MEMORY_MB = int(os.environ.get("JUDGE_MEMORY_MB", 256))
+JUDGE_WALL_SECONDS = float(os.environ.get("JUDGE_WALL_SECONDS", 5))
+# How long a submission waits for a free worker before giving up
+JUDGE_QUEUE_SECONDS = float(os.environ.get("JUDGE_QUEUE_SECONDS", 30))
+# Longest reply line read from a worker; a solution's result is part of it
+JUDGE_MAX_REPLY_BYTES = int(os.environ.get("JUDGE_MAX_REPLY_BYTES", 16 * 1024 * 1024))
+
+# Isolation of the processes running submitted code. When the judge runs as
+# root, workers switch to JUDGE_USER. JUDGE_SANDBOX_COMMAND, e.g.
+# "bwrap --ro-bind /usr /usr --ro-bind /lib /lib --unshare-all --die-with-parent --",
+# wraps the worker in a container as well. Without either, submitted code
+# would run with the app's own uid and could read its database, so the
+# judge refuses unless JUDGE_ALLOW_UNISOLATED=1 (local development only).
+# A different uid still sees world-readable files, so a SQLite database
+# must not be readable by JUDGE_USER unless the sandbox command hides it.
+JUDGE_USER = os.environ.get("JUDGE_USER", "nobody")
+JUDGE_SANDBOX_COMMAND = shlex.split(os.environ.get("JUDGE_SANDBOX_COMMAND", ""))
+JUDGE_ALLOW_UNISOLATED = os.environ.get("JUDGE_ALLOW_UNISOLATED") == "1"
+# Interpreter for workers; JUDGE_USER must be able to execute it
+JUDGE_PYTHON = os.environ.get("JUDGE_PYTHON", sys.executable)
+
+# Passed with -c, so JUDGE_USER needs no access to the app's directory
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'judge_sandbox.py'), encoding='utf-8') as f:
+    SANDBOX_SOURCE = f.read()
+
+class JudgeUnavailable(Exception):
+    """Submitted code cannot be run because no worker isolation is configured."""
+
+def entry_point_name(problem_title):
+    """Return the function name a solution is expected to define, e.g. 'Two Sum' -> 'two_sum'."""
+    return re.sub(r'[^a-z0-9]+', '_', problem_title.lower()).strip('_')
+
+def _sandbox_identity():
+    """(uid, gid) workers run as, or None to keep the current one."""
+    if os.geteuid() != 0:
+        return None
+    entry = pwd.getpwnam(JUDGE_USER)
+    if entry.pw_uid == 0:
+        raise JudgeUnavailable('JUDGE_USER must not be root')
+    return entry.pw_uid, entry.pw_gid
+
+class _WorkerLost(Exception):
+    """Raised when a worker stops answering; carries the resulting verdict.
+
+    runtime_ms is the limit that stopped it, when one did.
+    """
+
+    def __init__(self, status, runtime_ms=None):
+        super().__init__(status)
+        self.status = status
+        self.runtime_ms = runtime_ms
+
+def _is_duration(value):
+    return type(value) in (int, float) and 0 <= value < math.inf
+
+def _valid_reply(request, reply):
+    """Whether a reply has a shape the protocol allows in answer to the request."""
+    if not isinstance(reply, list) or not reply:
+        return False
+    if request == "load":
+        return reply == ["ready"] or (
+            len(reply) == 2 and reply[0] == "error" and reply[1] in WORKER_ERROR_STATUSES
+        )
+    if request == "case":
+        if len(reply) != 3 or not _is_duration(reply[2]):
+            return False
+        return reply[0] == "case" or (reply[0] == "error" and reply[1] in WORKER_ERROR_STATUSES)
+    return len(reply) == 2 and reply[0] == "finish" and type(reply[1]) is int and reply[1] >= 0
+
+class _Worker:
+    def __init__(self, process, workdir):
+        self.process = process
+        self.workdir = workdir
+        self._buffer = b''
+        self._request = None
+
+    def send(self, *message):
+        self._request = message[0]
+        self.process.stdin.write((json.dumps(message) + '\n').encode('utf-8'))
+        self.process.stdin.flush()
+
+    def receive(self, deadline):
+        """Read the reply to the last request, or None if the deadline passes first."""
+        fd = self.process.stdout.fileno()
+        while b'\n' not in self._buffer:
+            if len(self._buffer) > JUDGE_MAX_REPLY_BYTES:
+                raise ValueError('reply too long')
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError()
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        # Replies come from untrusted code, so they are parsed as plain JSON and
+        # every field is checked before the judge relies on it
+        reply = json.loads(line)
+        if not _valid_reply(self._request, reply):
+            raise ValueError('malformed reply')
+        return reply
+
+    def discard(self):
+        """Kill the worker (it is single-use) and release its pipes and directory."""
+        if self.process.poll() is None:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+class ExecutionPool:
+    """Pool of pre-started, isolated, resource-limited processes that run submissions.
+
+    Each worker is started ahead of time so a submission never pays for
+    interpreter startup, runs exactly one submission (all of its test cases)
+    and is then replaced. Workers are fresh interpreters running
+    judge_sandbox.py (not forks of the app) with an empty environment, an
+    empty working directory, an unprivileged uid when possible, and
+    rlimits on CPU, memory, file size, descriptors and processes.
+    """
+
+    def __init__(self, size=JUDGE_POOL_SIZE, cpu_seconds=JUDGE_CPU_SECONDS,
+                 memory_mb=JUDGE_MEMORY_MB, wall_seconds=JUDGE_WALL_SECONDS):
+        self.size = size
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self._identity = _sandbox_identity()
+        if self._identity is None and not JUDGE_SANDBOX_COMMAND and not JUDGE_ALLOW_UNISOLATED:
+            raise JudgeUnavailable(
+                'Submissions would run as the app user; run the judge as root (workers drop to '
+                'JUDGE_USER), set JUDGE_SANDBOX_COMMAND, or set JUDGE_ALLOW_UNISOLATED=1 for development'
+            )
+        self._idle = queue.Queue()
+        self._pid = os.getpid()
+        # Workers started and not yet discarded, idle or busy
+        self._started = 0
+        self._started_lock = threading.Lock()
+        try:
+            for _ in range(size):
+                self._idle.put(self._spawn())
+                self._started += 1
+        except OSError as e:
+            self.shutdown()
+            raise JudgeUnavailable('Could not start a judge worker: %s' % e)
+
+    def _spawn(self):
+        workdir = tempfile.mkdtemp(prefix='judge-')
+        options = {}
+        if self._identity is not None:
+            uid, gid = self._identity
+            os.chown(workdir, uid, gid)
+            options = {'user': uid, 'group': gid, 'extra_groups': []}
+        process = subprocess.Popen(
+            JUDGE_SANDBOX_COMMAND + [
+                JUDGE_PYTHON, '-I', '-c', SANDBOX_SOURCE, str(self.cpu_seconds), str(self.memory_mb)
+            ],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env={}, cwd=workdir, close_fds=True, start_new_session=True, **options
+        )
+        return _Worker(process, workdir)
+
+    def _refill(self):
+        """Start workers until the pool is back to its size.
+
+        A worker that fails to start is logged and tried again on the next
+        call, so a transient failure never shrinks the pool for good.
+        """
+        while True:
+            with self._started_lock:
+                if self._started >= self.size:
+                    return
+                self._started += 1
+            try:
+                self._idle.put(self._spawn())
+            except OSError:
+                with self._started_lock:
+                    self._started -= 1
+                logger.exception('Could not start a judge worker')
+                return
+
+    def _receive(self, worker, deadline):
+        """Wait for the worker's next reply without overrunning the wall-clock deadline."""
+        try:
+            reply = worker.receive(deadline)
+        except (EOFError, OSError):
+            # The worker died before answering: the kernel enforced a limit.
+            try:
+                exitcode = worker.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                exitcode = None
+            if exitcode in (-signal.SIGXCPU, -signal.SIGKILL):
+                # The CPU rlimit: SIGXCPU at the soft limit, SIGKILL at the hard one
+                raise _WorkerLost(TIME_LIMIT_EXCEEDED, self.cpu_seconds * 1000)
+            raise _WorkerLost(RUNTIME_ERROR)
+        except (ValueError, RecursionError):
+            raise _WorkerLost(RUNTIME_ERROR)
+        if reply is None:
+            raise _WorkerLost(TIME_LIMIT_EXCEEDED, self.wall_seconds * 1000)
+        return reply
+
+    def run(self, code, test_cases, entry_point):
+        """Run a submission against all test cases on one idle worker.
+
+        The solution is loaded once and the cases are streamed through it,
+        stopping at the first failure. Only inputs are sent to the worker;
+        its results are compared with the expected outputs here. Returns a verdict dict with total
+        runtime (ms), peak memory growth (KB) and per-case timings.
+        """
+        self._refill()
+        try:
+            worker = self._idle.get(timeout=JUDGE_QUEUE_SECONDS)
+        except queue.Empty:
+            raise JudgeUnavailable('No judge worker became free in %s seconds' % JUDGE_QUEUE_SECONDS)
+        deadline = time.monotonic() + self.wall_seconds
+        cases = []
+        memory_used = 0
+        status = ACCEPTED
+        limit_ms = None
+        try:
+            sample_input = test_cases[0].get("input", {}) if test_cases else {}
+            worker.send("load", code, entry_point, sample_input)
+            reply = self._receive(worker, deadline)
+            if reply[0] == "error":
+                status = reply[1]
+            else:
+                for index, case in enumerate(test_cases):
+                    worker.send("case", case.get("input", {}))
+                    reply = self._receive(worker, deadline)
+                    if reply[0] == "error":
+                        cases.append({"index": index, "passed": False, "time_ms": round(reply[2], 3)})
+                        status = reply[1]
+                        break
+                    passed = reply[1] == normalize_result(case.get("output"))
+                    cases.append({"index": index, "passed": passed, "time_ms": round(reply[2], 3)})
+                    if not passed:
+                        status = WRONG_ANSWER
+                        break
+
+                # A worker that reported an error has already exited
+                if status in (ACCEPTED, WRONG_ANSWER):
+                    worker.send("finish")
+                    memory_used = self._receive(worker, deadline)[1]
+        except _WorkerLost as lost:
+            status = lost.status
+            limit_ms = lost.runtime_ms
+        except OSError:
+            status = RUNTIME_ERROR
+        finally:
+            worker.discard()
+            with self._started_lock:
+                self._started -= 1
+            self._refill()
+
+        runtime = sum(case["time_ms"] for case in cases)
+        if limit_ms is not None:
+            runtime = max(runtime, limit_ms)
+        return {
+            "status": status,
+            "runtime": int(round(runtime)),
+            "memory_used": memory_used,
+            "cases": cases
+        }
+
+    def shutdown(self):
+        """Stop all idle workers."""
+        while True:
+            try:
+                self._idle.get_nowait().discard()
+            except queue.Empty:
+                break
+            with self._started_lock:
+                self._started -= 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_execution_pool():
+    """Return this process's execution pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        # A pool inherited across fork (e.g. gunicorn --preload) belongs to
+        # the parent; its pipes are useless here.
+        if _pool is None or _pool._pid != os.getpid():
+            _pool = ExecutionPool()
+        return _pool
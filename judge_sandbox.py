@@ -0,0 +1,180 @@
+"""Child process that runs one submitted solution.
+
+Started by judge.ExecutionPool as `python -I -c <this source>` with an empty
+environment, no inherited descriptors beyond its pipes, an empty working
+directory and (when the judge runs as root) an unprivileged uid. It only
+imports the standard library, so none of the app's modules, settings or
+database connections exist in the process running untrusted code.
+
+Messages are JSON lines: requests on stdin, replies on the original stdout.
+  ["load", code, entry_point, sample_input] -> ["ready"] | ["error", status]
+  ["case", case_input]                      -> ["case", result, elapsed_ms] | ["error", status, elapsed_ms]
+  ["finish"]                                -> ["finish", memory_kb]
+
+The worker never sees expected outputs: the parent compares each result
+itself, so nothing the solution does in here can change a verdict.
+"""
+import copy
+import io
+import json
+import os
+import signal
+import sys
+import time
+import types
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource is POSIX-only
+    resource = None
+
+# Statuses stored in CodingSolution.status
+ACCEPTED = "Accepted"
+WRONG_ANSWER = "Wrong Answer"
+RUNTIME_ERROR = "Runtime Error"
+TIME_LIMIT_EXCEEDED = "Time Limit Exceeded"
+MEMORY_LIMIT_EXCEEDED = "Memory Limit Exceeded"
+SYNTAX_ERROR = "Syntax Error"
+
+# Statuses a worker may report in an "error" reply
+WORKER_ERROR_STATUSES = (SYNTAX_ERROR, RUNTIME_ERROR, MEMORY_LIMIT_EXCEEDED, WRONG_ANSWER)
+
+# Descriptors left to the solution: the two protocol pipes, stderr and a few for imports
+SANDBOX_OPEN_FILES = 16
+
+def normalize_result(value):
+    """Round-trip a value through JSON so tuples compare equal to lists."""
+    return json.loads(json.dumps(value))
+
+def _current_rss_kb():
+    """Return the current resident set size of this process in KB."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+
+def _peak_rss_kb():
+    """Return the peak resident set size of this process in KB.
+
+    VmHWM starts over at exec; ru_maxrss would include the parent's memory
+    from before it, since it survives exec on Linux.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+
+def _apply_limits(cpu_seconds, memory_mb):
+    """Cap CPU time, memory, files, descriptors and child processes of this process."""
+    if resource is None:
+        return
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+    # The limit is on top of what the interpreter has already mapped
+    try:
+        with open('/proc/self/statm') as f:
+            mapped = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        mapped = 0
+    limit = mapped + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # No files written, no processes started, hardly any descriptors opened
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (SANDBOX_OPEN_FILES, SANDBOX_OPEN_FILES))
+
+def _resolve_entry_point(namespace, entry_point):
+    """Find the solution function, falling back to the only function defined."""
+    func = namespace.get(entry_point)
+    if callable(func):
+        return func
+    defined = [value for value in namespace.values()
+               if isinstance(value, types.FunctionType) and value.__code__.co_filename == '<solution>']
+    return defined[0] if len(defined) == 1 else None
+
+def _call_case(func, case_input):
+    """Call the solution on one input; in-place solutions are judged by their argument."""
+    args = copy.deepcopy(case_input)
+    actual = func(**args)
+    if actual is None and len(args) == 1:
+        # e.g. Reverse String modifies the list it is given and returns nothing
+        actual = next(iter(args.values()))
+    return actual
+
+def _load_solution(code, entry_point, sample_input):
+    """Compile and execute the solution once, returning its entry point."""
+    compiled = compile(code, '<solution>', 'exec')
+    # The editor's starter code reads `test_input` at module level
+    namespace = {"__name__": "__main__", "test_input": copy.deepcopy(sample_input)}
+    exec(compiled, namespace)
+    return _resolve_entry_point(namespace, entry_point)
+
+def _status_for(exc):
+    if isinstance(exc, SyntaxError):
+        return SYNTAX_ERROR
+    if isinstance(exc, MemoryError):
+        return MEMORY_LIMIT_EXCEEDED
+    return RUNTIME_ERROR
+
+def main(cpu_seconds, memory_mb):
+    # The parent handles interrupts; an idle worker should just go away with it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Keep the protocol channel to ourselves; the solution's prints go nowhere
+    requests = io.TextIOWrapper(os.fdopen(os.dup(0), 'rb', buffering=0), encoding='utf-8')
+    replies = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    sys.stdin = io.StringIO()
+    sys.stdout = io.StringIO()
+
+    def send(*message):
+        replies.write(json.dumps(message) + '\n')
+        replies.flush()
+
+    line = requests.readline()
+    if not line:
+        return
+    _, code, entry_point, sample_input = json.loads(line)
+
+    _apply_limits(cpu_seconds, memory_mb)
+    baseline_kb = _current_rss_kb()
+
+    try:
+        func = _load_solution(code, entry_point, sample_input)
+    except BaseException as exc:
+        send("error", _status_for(exc))
+        return
+    if func is None:
+        send("error", WRONG_ANSWER)
+        return
+    send("ready")
+
+    for line in requests:
+        message = json.loads(line)
+        if message[0] == "finish":
+            send("finish", max(_peak_rss_kb() - baseline_kb, 0))
+            return
+
+        _, case_input = message
+        started = time.perf_counter()
+        try:
+            actual = _call_case(func, case_input)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            result = normalize_result(actual)
+        except BaseException as exc:
+            send("error", _status_for(exc), (time.perf_counter() - started) * 1000)
+            return
+        send("case", result, elapsed_ms)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]), int(sys.argv[2]))
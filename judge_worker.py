@@ -0,0 +1,5 @@
+from app import app
+from submissions import run_judge_worker
+
+if __name__ == '__main__':
+    run_judge_worker()
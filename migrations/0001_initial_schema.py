@@ -0,0 +1,175 @@
+"""Tables of the original schema, and the profile columns added to it before migrations existed."""
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+user = sa.Table(
+    'user', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('username', sa.String(64), unique=True, nullable=False),
+    sa.Column('email', sa.String(120), unique=True, nullable=False),
+    sa.Column('password_hash', sa.String(256), nullable=False),
+    sa.Column('first_name', sa.String(64)),
+    sa.Column('last_name', sa.String(64)),
+    sa.Column('dob', sa.Date),
+    sa.Column('institution', sa.String(128)),
+    sa.Column('major', sa.String(128)),
+    sa.Column('bio', sa.Text),
+    sa.Column('reset_token', sa.String(100)),
+    sa.Column('reset_token_expiration', sa.DateTime),
+    sa.Column('created_at', sa.DateTime),
+)
+
+profile = sa.Table(
+    'profile', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('gpa', sa.Float),
+    sa.Column('credits_completed', sa.Integer),
+    sa.Column('graduation_year', sa.Integer),
+    sa.Column('skills', sa.Text),
+    sa.Column('achievements', sa.Text),
+    sa.Column('github_url', sa.String(128)),
+    sa.Column('linkedin_url', sa.String(128)),
+    sa.Column('portfolio_url', sa.String(128)),
+    sa.Column('updated_at', sa.DateTime),
+)
+
+# Added to profile by hand before migrations existed, so older databases may lack them
+PROFILE_COLUMNS = [
+    sa.Column('areas_of_interest', sa.Text),
+    sa.Column('career_objective', sa.Text),
+    sa.Column('extracurricular_activities', sa.Text),
+    sa.Column('certifications', sa.Text),
+    sa.Column('secondary_education', sa.String(256)),
+    sa.Column('higher_education', sa.String(256)),
+    sa.Column('languages_known', sa.Text),
+    sa.Column('twitter_url', sa.String(128)),
+    sa.Column('instagram_url', sa.String(128)),
+    sa.Column('profile_picture', sa.String(256)),
+]
+
+course = sa.Table(
+    'course', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('code', sa.String(16), nullable=False),
+    sa.Column('title', sa.String(128), nullable=False),
+    sa.Column('description', sa.Text),
+    sa.Column('credits', sa.Integer),
+    sa.Column('prerequisites', sa.Text),
+    sa.Column('department', sa.String(64)),
+    sa.Column('level', sa.String(32)),
+    sa.Column('is_nptel', sa.Boolean),
+    sa.Column('created_at', sa.DateTime),
+)
+
+enrollment = sa.Table(
+    'enrollment', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('course_id', sa.Integer, sa.ForeignKey('course.id'), nullable=False),
+    sa.Column('status', sa.String(32)),
+    sa.Column('grade', sa.String(2)),
+    sa.Column('completed_date', sa.Date),
+    sa.Column('created_at', sa.DateTime),
+)
+
+career_path = sa.Table(
+    'career_path', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(64), nullable=False),
+    sa.Column('description', sa.Text),
+    sa.Column('required_skills', sa.Text),
+    sa.Column('recommended_courses', sa.Text),
+    sa.Column('job_outlook', sa.Text),
+    sa.Column('created_at', sa.DateTime),
+)
+
+career_goal = sa.Table(
+    'career_goal', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('career_path_id', sa.Integer, sa.ForeignKey('career_path.id')),
+    sa.Column('custom_title', sa.String(128)),
+    sa.Column('description', sa.Text),
+    sa.Column('target_date', sa.Date),
+    sa.Column('progress', sa.Integer),
+    sa.Column('created_at', sa.DateTime),
+)
+
+coding_problem = sa.Table(
+    'coding_problem', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('title', sa.String(128), nullable=False),
+    sa.Column('description', sa.Text, nullable=False),
+    sa.Column('difficulty', sa.String(16)),
+    sa.Column('topic', sa.String(64)),
+    sa.Column('example_input', sa.Text),
+    sa.Column('example_output', sa.Text),
+    sa.Column('test_cases', sa.Text),
+    sa.Column('created_at', sa.DateTime),
+)
+
+coding_solution = sa.Table(
+    'coding_solution', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('problem_id', sa.Integer, sa.ForeignKey('coding_problem.id'), nullable=False),
+    sa.Column('language', sa.String(32)),
+    sa.Column('code', sa.Text),
+    sa.Column('status', sa.String(16)),
+    sa.Column('runtime', sa.Integer),
+    sa.Column('memory_used', sa.Integer),
+    sa.Column('submitted_at', sa.DateTime),
+)
+
+aptitude_test = sa.Table(
+    'aptitude_test', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('category', sa.String(64), nullable=False),
+    sa.Column('description', sa.Text),
+    sa.Column('total_questions', sa.Integer),
+    sa.Column('time_limit', sa.Integer),
+    sa.Column('passing_score', sa.Integer),
+    sa.Column('created_at', sa.DateTime),
+)
+
+aptitude_question = sa.Table(
+    'aptitude_question', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('test_id', sa.Integer, sa.ForeignKey('aptitude_test.id'), nullable=False),
+    sa.Column('question_text', sa.Text, nullable=False),
+    sa.Column('options', sa.Text),
+    sa.Column('correct_option', sa.Integer),
+    sa.Column('explanation', sa.Text),
+    sa.Column('created_at', sa.DateTime),
+)
+
+aptitude_test_result = sa.Table(
+    'aptitude_test_result', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('test_id', sa.Integer, sa.ForeignKey('aptitude_test.id'), nullable=False),
+    sa.Column('score', sa.Integer),
+    sa.Column('score_percentage', sa.Float),
+    sa.Column('answers', sa.Text),
+    sa.Column('time_taken', sa.Integer),
+    sa.Column('completed_at', sa.DateTime),
+)
+
+ai_chat_message = sa.Table(
+    'ai_chat_message', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('is_user', sa.Boolean),
+    sa.Column('message', sa.Text, nullable=False),
+    sa.Column('created_at', sa.DateTime),
+)
+
+def upgrade(op):
+    op.create_tables(
+        user, profile, course, enrollment, career_path, career_goal, coding_problem,
+        coding_solution, aptitude_test, aptitude_question, aptitude_test_result, ai_chat_message
+    )
+    for column in PROFILE_COLUMNS:
+        op.add_column('profile', column)
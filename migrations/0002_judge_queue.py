@@ -0,0 +1,44 @@
+"""Judge job queue, verdict cache and deduplicated code storage."""
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+code_blob = sa.Table(
+    'code_blob', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('hash', sa.String(64), unique=True, nullable=False),
+    sa.Column('code', sa.Text, nullable=False),
+    sa.Column('created_at', sa.DateTime),
+)
+
+judge_verdict = sa.Table(
+    'judge_verdict', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('problem_id', sa.Integer, sa.ForeignKey('coding_problem.id'), nullable=False),
+    sa.Column('test_cases_version', sa.Integer, nullable=False),
+    sa.Column('language', sa.String(32), nullable=False),
+    sa.Column('code_hash', sa.String(64), nullable=False),
+    sa.Column('status', sa.String(16)),
+    sa.Column('runtime', sa.Integer),
+    sa.Column('memory_used', sa.Integer),
+    sa.Column('created_at', sa.DateTime),
+    sa.UniqueConstraint('problem_id', 'test_cases_version', 'language', 'code_hash', name='uq_judge_verdict_key'),
+)
+
+judge_job = sa.Table(
+    'judge_job', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('solution_id', sa.Integer, sa.ForeignKey('coding_solution.id'), nullable=False, unique=True),
+    sa.Column('status', sa.String(16)),
+    sa.Column('attempts', sa.Integer),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('started_at', sa.DateTime),
+    sa.Column('finished_at', sa.DateTime),
+    sa.Index('ix_judge_job_status_id', 'status', 'id'),
+)
+
+def upgrade(op):
+    op.reflect(metadata, 'coding_problem', 'coding_solution')
+    op.create_tables(code_blob, judge_verdict, judge_job)
+    op.add_column('coding_problem', sa.Column('test_cases_version', sa.Integer, nullable=False, server_default='1'))
+    op.add_column('coding_solution', sa.Column('code_blob_id', sa.Integer, sa.ForeignKey('code_blob.id')))
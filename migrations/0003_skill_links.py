@@ -0,0 +1,33 @@
+"""Normalized skill, interest and language tags."""
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+skill = sa.Table(
+    'skill', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(64), nullable=False),
+    sa.Column('slug', sa.String(64), unique=True, nullable=False),
+    sa.Column('created_at', sa.DateTime),
+)
+
+profile_skill = sa.Table(
+    'profile_skill', metadata,
+    sa.Column('profile_id', sa.Integer, sa.ForeignKey('profile.id'), primary_key=True),
+    sa.Column('kind', sa.String(16), primary_key=True),
+    sa.Column('skill_id', sa.Integer, sa.ForeignKey('skill.id'), primary_key=True),
+    sa.Column('position', sa.Integer),
+    sa.Index('ix_profile_skill_skill_kind', 'skill_id', 'kind'),
+)
+
+career_path_skill = sa.Table(
+    'career_path_skill', metadata,
+    sa.Column('career_path_id', sa.Integer, sa.ForeignKey('career_path.id'), primary_key=True),
+    sa.Column('skill_id', sa.Integer, sa.ForeignKey('skill.id'), primary_key=True),
+    sa.Column('position', sa.Integer),
+    sa.Index('ix_career_path_skill_skill', 'skill_id'),
+)
+
+def upgrade(op):
+    op.reflect(metadata, 'profile', 'career_path')
+    op.create_tables(skill, profile_skill, career_path_skill)
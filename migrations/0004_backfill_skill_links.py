@@ -0,0 +1,65 @@
+"""Populate the skill link tables from the comma-separated text columns."""
+from datetime import datetime
+import sqlalchemy as sa
+from migrations import backfill_in_batches
+from skill_index import normalize_skill, split_skills
+
+TRANSACTIONAL = False
+
+SKILL_SLUG_LENGTH = 64
+
+# Text columns mirrored into skill link rows, and the kind of tag each holds
+PROFILE_COLUMNS = {'skills': 'skill', 'areas_of_interest': 'interest', 'languages_known': 'language'}
+CAREER_PATH_COLUMNS = {'required_skills': 'skill'}
+
+def _skill_id(op, skill, name, skill_ids):
+    """Id of the skill row for a name, inserting it the first time."""
+    slug = normalize_skill(name)[:SKILL_SLUG_LENGTH]
+    if slug not in skill_ids:
+        skill_id = op.conn.execute(sa.select(skill.c.id).where(skill.c.slug == slug)).scalar()
+        if skill_id is None:
+            skill_id = op.conn.execute(skill.insert().values(
+                name=name[:SKILL_SLUG_LENGTH], slug=slug, created_at=datetime.utcnow()
+            )).inserted_primary_key[0]
+        skill_ids[slug] = skill_id
+    return skill_ids[slug]
+
+def _links(op, skill, row, columns, skill_ids):
+    """(kind, skill_id, position) for each tag of a row, once per kind and skill."""
+    links = {}
+    for column, kind in columns.items():
+        for position, name in enumerate(split_skills(getattr(row, column))):
+            links.setdefault((kind, _skill_id(op, skill, name, skill_ids)), position)
+    return [(kind, skill_id, position) for (kind, skill_id), position in links.items()]
+
+def upgrade(op):
+    profile, career_path, skill, profile_skill, career_path_skill = op.reflect(
+        sa.MetaData(), 'profile', 'career_path', 'skill', 'profile_skill', 'career_path_skill'
+    )
+    skill_ids = {}
+
+    # Rows are resynced from scratch, so an interrupted run simply starts over
+    def sync_profile(row):
+        links = _links(op, skill, row, PROFILE_COLUMNS, skill_ids)
+        op.conn.execute(profile_skill.delete().where(profile_skill.c.profile_id == row.id))
+        if links:
+            op.conn.execute(profile_skill.insert(), [
+                {'profile_id': row.id, 'kind': kind, 'skill_id': skill_id, 'position': position}
+                for kind, skill_id, position in links
+            ])
+
+    def sync_career_path(row):
+        links = _links(op, skill, row, CAREER_PATH_COLUMNS, skill_ids)
+        op.conn.execute(career_path_skill.delete().where(career_path_skill.c.career_path_id == row.id))
+        if links:
+            op.conn.execute(career_path_skill.insert(), [
+                {'career_path_id': row.id, 'skill_id': skill_id, 'position': position}
+                for _, skill_id, position in links
+            ])
+
+    backfill_in_batches(op, lambda last_id: sa.select(
+        profile.c.id, *(profile.c[column] for column in PROFILE_COLUMNS)
+    ).where(profile.c.id > last_id).order_by(profile.c.id), sync_profile)
+    backfill_in_batches(op, lambda last_id: sa.select(
+        career_path.c.id, *(career_path.c[column] for column in CAREER_PATH_COLUMNS)
+    ).where(career_path.c.id > last_id).order_by(career_path.c.id), sync_career_path)
@@ -0,0 +1,5 @@
+"""Full-text course search: an FTS5 table on SQLite, a tsvector column with a GIN index on PostgreSQL."""
+from search import ensure_course_search_index
+
+def upgrade(op):
+    ensure_course_search_index(op.conn)
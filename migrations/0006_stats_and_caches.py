@@ -0,0 +1,64 @@
+"""Per-user stats, catalog cache versions, item analysis, advisor summaries and admin accounts."""
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+user_stats = sa.Table(
+    'user_stats', metadata,
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), primary_key=True),
+    sa.Column('easy_solved', sa.Integer),
+    sa.Column('medium_solved', sa.Integer),
+    sa.Column('hard_solved', sa.Integer),
+    sa.Column('submissions', sa.Integer),
+    sa.Column('accepted_submissions', sa.Integer),
+    sa.Column('tests_taken', sa.Integer),
+    sa.Column('best_scores', sa.Text),
+    sa.Column('activity', sa.Text),
+    sa.Column('current_streak', sa.Integer),
+    sa.Column('longest_streak', sa.Integer),
+    sa.Column('last_active_date', sa.Date),
+    sa.Column('updated_at', sa.DateTime),
+)
+
+cache_version = sa.Table(
+    'cache_version', metadata,
+    sa.Column('name', sa.String(64), primary_key=True),
+    sa.Column('version', sa.Integer, nullable=False),
+    sa.Column('updated_at', sa.DateTime),
+)
+
+aptitude_test_stats = sa.Table(
+    'aptitude_test_stats', metadata,
+    sa.Column('test_id', sa.Integer, sa.ForeignKey('aptitude_test.id'), primary_key=True),
+    sa.Column('question_ids', sa.Text),
+    sa.Column('last_result_id', sa.Integer, nullable=False),
+    sa.Column('results_count', sa.Integer, nullable=False),
+    sa.Column('score_sum', sa.Integer, nullable=False),
+    sa.Column('score_sq_sum', sa.Integer, nullable=False),
+    sa.Column('score_histogram', sa.Text),
+    sa.Column('updated_at', sa.DateTime),
+)
+
+aptitude_question_stats = sa.Table(
+    'aptitude_question_stats', metadata,
+    sa.Column('question_id', sa.Integer, primary_key=True),
+    sa.Column('test_id', sa.Integer, sa.ForeignKey('aptitude_test.id'), nullable=False, index=True),
+    sa.Column('position', sa.Integer, nullable=False),
+    sa.Column('answered_count', sa.Integer, nullable=False),
+    sa.Column('correct_count', sa.Integer, nullable=False),
+    sa.Column('correct_score_sum', sa.Integer, nullable=False),
+    sa.Column('option_counts', sa.Text),
+)
+
+advisor_summary = sa.Table(
+    'advisor_summary', metadata,
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), primary_key=True),
+    sa.Column('summary', sa.Text),
+    sa.Column('summarized_through_id', sa.Integer, nullable=False),
+    sa.Column('updated_at', sa.DateTime),
+)
+
+def upgrade(op):
+    op.reflect(metadata, 'user', 'aptitude_test')
+    op.create_tables(user_stats, cache_version, aptitude_test_stats, aptitude_question_stats, advisor_summary)
+    op.add_column('user', sa.Column('is_admin', sa.Boolean, nullable=False, server_default=sa.false()))
@@ -0,0 +1,6 @@
+"""Compact aptitude test answers."""
+import sqlalchemy as sa
+
+def upgrade(op):
+    op.add_column('aptitude_test_result', sa.Column('answer_bytes', sa.LargeBinary))
+    op.add_column('aptitude_test_result', sa.Column('correct_bytes', sa.LargeBinary))
@@ -0,0 +1,47 @@
+"""Encode the JSON answers of older test results into answer_bytes and correct_bytes."""
+import json
+import sqlalchemy as sa
+from migrations import backfill_in_batches
+
+TRANSACTIONAL = False
+
+# Stored byte for a question left blank
+UNANSWERED_BYTE = 0xFF
+
+def _selected(answers, question_id):
+    """The option picked for a question in the legacy {question_id: option} JSON, or None."""
+    try:
+        choice = int(answers.get(str(question_id)))
+    except (TypeError, ValueError):
+        return None
+    return choice if 0 <= choice < UNANSWERED_BYTE else None
+
+def upgrade(op):
+    result, question = op.reflect(sa.MetaData(), 'aptitude_test_result', 'aptitude_question')
+    answer_keys = {}
+
+    def answer_key(test_id):
+        """(question id, correct option) of a test's questions, in question id order."""
+        if test_id not in answer_keys:
+            answer_keys[test_id] = op.conn.execute(
+                sa.select(question.c.id, question.c.correct_option)
+                .where(question.c.test_id == test_id).order_by(question.c.id)
+            ).all()
+        return answer_keys[test_id]
+
+    def encode(row):
+        try:
+            answers = json.loads(row.answers) if row.answers else {}
+        except ValueError:
+            answers = {}
+        if not isinstance(answers, dict):
+            answers = {}
+        selected = [(_selected(answers, question_id), correct) for question_id, correct in answer_key(row.test_id)]
+        op.conn.execute(result.update().where(result.c.id == row.id).values(
+            answer_bytes=bytes(UNANSWERED_BYTE if choice is None else choice for choice, _ in selected),
+            correct_bytes=bytes(int(choice is not None and choice == correct) for choice, correct in selected),
+        ))
+
+    backfill_in_batches(op, lambda last_id: sa.select(result.c.id, result.c.test_id, result.c.answers).where(
+        result.c.id > last_id, result.c.answer_bytes.is_(None)
+    ).order_by(result.c.id), encode)
@@ -0,0 +1,19 @@
+"""Hashed reset tokens in their own table; links issued before this migration stop working."""
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+password_reset_token = sa.Table(
+    'password_reset_token', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False, index=True),
+    sa.Column('token_hash', sa.String(64), unique=True, nullable=False),
+    sa.Column('expires_at', sa.DateTime, nullable=False, index=True),
+    sa.Column('created_at', sa.DateTime),
+)
+
+def upgrade(op):
+    op.reflect(metadata, 'user')
+    op.create_tables(password_reset_token)
+    op.drop_column('user', 'reset_token')
+    op.drop_column('user', 'reset_token_expiration')
@@ -0,0 +1,15 @@
+"""Case-insensitive email lookups and per-user history indexes, built without blocking writes."""
+
+TRANSACTIONAL = False
+
+def upgrade(op):
+    op.create_index('ix_user_email_lower', 'user', 'lower(email)')
+    op.create_index('ix_enrollment_user_course', 'enrollment', 'user_id', 'course_id')
+    op.create_index('ix_career_goal_user_created', 'career_goal', 'user_id', 'created_at')
+    op.create_index('ix_coding_solution_user_submitted', 'coding_solution', 'user_id', 'submitted_at')
+    op.create_index('ix_coding_solution_user_problem_submitted', 'coding_solution', 'user_id', 'problem_id', 'submitted_at')
+    op.create_index('ix_aptitude_test_result_user_completed', 'aptitude_test_result', 'user_id', 'completed_at')
+    op.create_index('ix_aptitude_test_result_user_test_completed', 'aptitude_test_result', 'user_id', 'test_id', 'completed_at')
+    op.create_index('ix_aptitude_test_result_test_id', 'aptitude_test_result', 'test_id', 'id')
+    op.create_index('ix_ai_chat_message_user_created', 'ai_chat_message', 'user_id', 'created_at', 'id')
+    op.create_index('ix_ai_chat_message_user_id', 'ai_chat_message', 'user_id', 'id')
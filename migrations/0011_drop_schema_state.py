@@ -0,0 +1,4 @@
+"""The boot-time schema fingerprint is superseded by schema_version."""
+
+def upgrade(op):
+    op.execute('DROP TABLE IF EXISTS schema_state')
@@ -0,0 +1,16 @@
+"""Record which questions, in which order, each test result's answer bytes are for."""
+import sqlalchemy as sa
+
+def upgrade(op):
+    op.add_column('aptitude_test_result', sa.Column('question_ids', sa.Text))
+    result, question = op.reflect(sa.MetaData(), 'aptitude_test_result', 'aptitude_question')
+
+    # Until now bytes were always in the order of the test's current questions
+    layouts = {}
+    for test_id, question_id in op.conn.execute(
+            sa.select(question.c.test_id, question.c.id).order_by(question.c.test_id, question.c.id)):
+        layouts.setdefault(test_id, []).append(str(question_id))
+    for test_id, in op.conn.execute(sa.select(result.c.test_id).distinct()):
+        op.conn.execute(result.update().where(
+            result.c.test_id == test_id, result.c.question_ids.is_(None), result.c.answer_bytes.isnot(None)
+        ).values(question_ids=','.join(layouts.get(test_id, []))))
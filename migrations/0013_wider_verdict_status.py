@@ -0,0 +1,6 @@
+"""Widen verdict statuses: "Time Limit Exceeded" and "Memory Limit Exceeded" do not fit in 16 characters."""
+import sqlalchemy as sa
+
+def upgrade(op):
+    for table in ('coding_solution', 'judge_verdict'):
+        op.alter_column_type(table, 'status', sa.String(32))
@@ -0,0 +1,5 @@
+"""Store the per-test-case timings of each judged solution."""
+import sqlalchemy as sa
+
+def upgrade(op):
+    op.add_column('coding_solution', sa.Column('case_results', sa.Text))
@@ -0,0 +1,237 @@
+"""Versioned schema migrations.
+
+Each module in this package named NNNN_description.py is one migration,
+applied in version order and recorded in the schema_version table. A
+migration defines upgrade(op) and may set TRANSACTIONAL = False when it
+needs to run outside a transaction: PostgreSQL's CREATE INDEX CONCURRENTLY,
+or a backfill that commits batch by batch. Non-transactional migrations
+must be safe to run again after a crash part way through; the Operations
+helpers all are.
+
+Migrations describe the tables they create themselves and change data with
+SQL on op.conn, never through the models: those describe the newest schema,
+and their session listeners write to tables a migration may predate.
+"""
+import importlib
+import logging
+import os
+import pkgutil
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl is POSIX-only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Apply pending migrations when a worker starts; turn off where deploys run `flask migrate` themselves
+AUTO_MIGRATE = os.environ.get("AUTO_MIGRATE", "1") == "1"
+# Arbitrary key for the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_ID = 727400
+# Suffix of the lock file next to a SQLite database, which has no advisory locks
+SQLITE_LOCK_SUFFIX = '.migrate-lock'
+
+Migration = namedtuple('Migration', 'version name module')
+
+class Operations:
+    """Idempotent schema operations for migrations, on either SQLite or PostgreSQL."""
+
+    def __init__(self, conn, transactional=True):
+        self.conn = conn
+        self.transactional = transactional
+        self.dialect = conn.dialect.name
+
+    def execute(self, statement, params=None):
+        return self.conn.execute(text(statement), params or {})
+
+    def quote(self, name):
+        return self.conn.dialect.identifier_preparer.quote(name)
+
+    def has_table(self, table):
+        return inspect(self.conn).has_table(table)
+
+    def has_column(self, table, column):
+        return any(c['name'] == column for c in inspect(self.conn).get_columns(table))
+
+    def has_index(self, table, index):
+        return any(i['name'] == index for i in inspect(self.conn).get_indexes(table))
+
+    def reflect(self, metadata, *tables):
+        """Load existing tables into metadata, for new tables to reference or for backfill SQL."""
+        metadata.reflect(self.conn, only=tables, extend_existing=True, resolve_fks=False)
+        return [metadata.tables[table] for table in tables]
+
+    def create_tables(self, *tables):
+        """Create sqlalchemy Tables, with their indexes, skipping ones that exist.
+
+        Tables they reference must already be in their MetaData, declared or
+        loaded with reflect().
+        """
+        for table in tables:
+            table.create(self.conn, checkfirst=True)
+
+    def add_column(self, table, column):
+        """Add a sqlalchemy Column to an existing table unless it is already there."""
+        if self.has_column(table, column.name):
+            return
+        definition = str(CreateColumn(column).compile(dialect=self.conn.dialect))
+        for foreign_key in column.foreign_keys:
+            target_table, target_column = foreign_key.target_fullname.split('.')
+            definition += ' REFERENCES %s (%s)' % (self.quote(target_table), self.quote(target_column))
+        self.execute('ALTER TABLE %s ADD COLUMN %s' % (self.quote(table), definition))
+
+    def drop_column(self, table, column):
+        if self.has_column(table, column):
+            self.execute('ALTER TABLE %s DROP COLUMN %s' % (self.quote(table), self.quote(column)))
+
+    def alter_column_type(self, table, column, type_):
+        """Change a column to a sqlalchemy type, e.g. to widen a String.
+
+        SQLite does not enforce declared lengths, so there it is left alone.
+        On PostgreSQL widening a varchar only updates the catalog.
+        """
+        if self.dialect == 'sqlite':
+            return
+        self.execute('ALTER TABLE %s ALTER COLUMN %s TYPE %s' % (
+            self.quote(table), self.quote(column), type_.compile(dialect=self.conn.dialect)
+        ))
+
+    def create_index(self, name, table, *columns, unique=False):
+        """Create an index unless it exists. Columns may be expressions, e.g. 'lower(email)'.
+
+        On PostgreSQL the index is built CONCURRENTLY, so writes continue
+        meanwhile; that needs a migration with TRANSACTIONAL = False.
+        """
+        concurrently = ''
+        if self.dialect == 'postgresql' and not self.transactional:
+            concurrently = 'CONCURRENTLY '
+            # A failed concurrent build leaves an invalid index behind; drop it so the build starts over
+            invalid = self.execute(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid", {'name': name}
+            ).first()
+            if invalid:
+                self.execute('DROP INDEX CONCURRENTLY %s' % self.quote(name))
+        self.execute('CREATE %sINDEX %sIF NOT EXISTS %s ON %s (%s)' % (
+            'UNIQUE ' if unique else '', concurrently, self.quote(name), self.quote(table),
+            ', '.join(columns)
+        ))
+
+def backfill_in_batches(op, query, apply, batch_size=500):
+    """Run apply() over the rows of a select, batch by batch, on op.conn.
+
+    query(last_id) must return a select of the rows with id above last_id,
+    in id order, and should skip rows already done so an interrupted
+    backfill resumes where it stopped. In a non-transactional migration
+    every statement commits on its own, so apply() must be safe to repeat.
+    """
+    last_id = 0
+    while True:
+        batch = op.conn.execute(query(last_id).limit(batch_size)).all()
+        if not batch:
+            return
+        for row in batch:
+            apply(row)
+        last_id = batch[-1].id
+
+def all_migrations():
+    """Every migration in this package, in version order."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = re.match(r'^(\d{4})_(\w+)$', module_info.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), module_info.name))
+    return sorted(migrations)
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(128) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def applied_versions(conn):
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+def current_version():
+    """The newest applied migration, or None before the first migration (or if the database is unreachable)."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT max(version) FROM schema_version")).scalar()
+    except SQLAlchemyError:
+        return None
+
+def _record(conn, migration):
+    conn.execute(text(
+        "INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at) "
+        "ON CONFLICT (version) DO NOTHING"
+    ), {
+        'version': migration.version, 'name': migration.name, 'applied_at': datetime.utcnow()
+    })
+
+def _apply(migration):
+    module = importlib.import_module('%s.%s' % (__name__, migration.module))
+    logger.info('Applying migration %04d %s', migration.version, migration.name)
+    if getattr(module, 'TRANSACTIONAL', True):
+        with db.engine.begin() as conn:
+            module.upgrade(Operations(conn))
+            _record(conn, migration)
+    else:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            module.upgrade(Operations(conn, transactional=False))
+            _record(conn, migration)
+
+@contextmanager
+def _migration_lock(conn):
+    """Hold a lock shared by every process using the database while migrating."""
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {'id': MIGRATION_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MIGRATION_LOCK_ID})
+        return
+    database = conn.engine.url.database
+    if conn.dialect.name != 'sqlite' or fcntl is None or not database or database == ':memory:':
+        yield
+        return
+    with open(database + SQLITE_LOCK_SUFFIX, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def upgrade(target=None):
+    """Apply pending migrations up to target (default: all); returns the migrations applied."""
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as lock_conn:
+        # Workers starting together wait for the first one, then find nothing left to do
+        with _migration_lock(lock_conn):
+            done = applied_versions(lock_conn)
+            pending = [m for m in all_migrations() if m.version not in done and (target is None or m.version <= target)]
+            for migration in pending:
+                _apply(migration)
+            return pending
+
+def check_schema():
+    """Called at boot: one query to compare the database with the newest migration.
+
+    Behind, it migrates when AUTO_MIGRATE is on and otherwise logs a warning.
+    """
+    latest = all_migrations()[-1].version
+    version = current_version()
+    if version is not None and version >= latest:
+        return False
+    if not AUTO_MIGRATE:
+        logger.warning('Database schema is at version %s but the code expects %d; run `flask migrate`.', version, latest)
+        return False
+    upgrade()
+    return True
@@ -1,9 +1,17 @@
 from datetime import datetime, timedelta
+import hashlib
 import os
 import secrets
 from app import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password, needs_rehash
+from skill_index import normalize_skill, split_skills
+
+# Longest skill name and slug stored; longer entries are cut to this length
+SKILL_SLUG_LENGTH = 64
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,48 +24,88 @@ class User(UserMixin, db.Model):
     institution = db.Column(db.String(128))
     major = db.Column(db.String(128))
     bio = db.Column(db.Text)
-    reset_token = db.Column(db.String(100))
-    reset_token_expiration = db.Column(db.DateTime)
+    is_admin = db.Column(db.Boolean, nullable=False, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Sign-in and password reset look emails up case-insensitively
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+    )
+    
     # Relationships
     profile = db.relationship('Profile', backref='user', uselist=False, cascade="all, delete-orphan")
     career_goals = db.relationship('CareerGoal', backref='user', lazy=True, cascade="all, delete-orphan")
     aptitude_tests = db.relationship('AptitudeTestResult', backref='user', lazy=True, cascade="all, delete-orphan")
     coding_solutions = db.relationship('CodingSolution', backref='user', lazy=True, cascade="all, delete-orphan")
+    reset_tokens = db.relationship('PasswordResetToken', backref='user', lazy=True, cascade="all, delete-orphan")
+
+    @staticmethod
+    def find_by_email(email):
+        """Find a user by email address, ignoring case"""
+        return User.query.filter(db.func.lower(User.email) == email.strip().lower()).first()
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def upgrade_password_hash(self, password):
+        """Re-hash a just-verified password if it was stored with older hash parameters"""
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+            return True
+        return False
         
     def get_reset_token(self, expires_in=3600):
-        """Generate a password reset token that expires in 1 hour by default"""
-        self.reset_token = secrets.token_urlsafe(32)
-        self.reset_token_expiration = datetime.utcnow() + timedelta(seconds=expires_in)
-        db.session.commit()
-        return self.reset_token
+        """Generate a password reset token that expires in 1 hour by default, replacing older ones.
+
+        Only a hash of the token is stored; the caller commits.
+        """
+        self.clear_reset_token()
+        token = secrets.token_urlsafe(32)
+        db.session.add(PasswordResetToken(
+            user_id=self.id,
+            token_hash=PasswordResetToken.hash_token(token),
+            expires_at=datetime.utcnow() + timedelta(seconds=expires_in)
+        ))
+        return token
         
     def verify_reset_token(self, token):
-        """Verify if the reset token is valid and not expired"""
-        if self.reset_token != token or self.reset_token_expiration < datetime.utcnow():
-            return False
-        return True
+        """Verify if the reset token is valid, not expired and belongs to this user"""
+        return User.verify_reset_token_static(token) is self
         
     @staticmethod
     def verify_reset_token_static(token):
-        """Static method to find user by token"""
-        user = User.query.filter_by(reset_token=token).first()
-        if user is None or user.reset_token_expiration < datetime.utcnow():
-            return None
-        return user
+        """Find the user a valid reset token belongs to"""
+        reset_token = PasswordResetToken.query.filter(
+            PasswordResetToken.token_hash == PasswordResetToken.hash_token(token),
+            PasswordResetToken.expires_at > datetime.utcnow()
+        ).first()
+        return reset_token.user if reset_token else None
     
     def clear_reset_token(self):
-        """Clear the reset token after it has been used"""
-        self.reset_token = None
-        self.reset_token_expiration = None
-        db.session.commit()
+        """Revoke this user's reset tokens; the caller commits"""
+        PasswordResetToken.query.filter_by(user_id=self.id).delete(synchronize_session=False)
+
+class PasswordResetToken(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the token sent to the user
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def hash_token(token):
+        # Tokens are random, so a plain digest is enough to make a leaked table useless
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def sweep_expired():
+        """Delete expired tokens and return how many there were; the caller commits"""
+        return PasswordResetToken.query.filter(
+            PasswordResetToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
 
 class Profile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -81,6 +129,65 @@ class Profile(db.Model):
     instagram_url = db.Column(db.String(128))
     profile_picture = db.Column(db.String(256))
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Normalized copies of skills, areas_of_interest and languages_known,
+    # kept in sync with the text columns on every flush
+    skill_links = db.relationship('ProfileSkill', backref='profile', lazy=True, cascade="all, delete-orphan",
+                                  order_by='ProfileSkill.position')
+    
+    def _tags(self, kind):
+        return [link.skill for link in self.skill_links if link.kind == kind]
+    
+    @property
+    def skill_tags(self):
+        return self._tags('skill')
+    
+    @property
+    def interest_tags(self):
+        return self._tags('interest')
+    
+    @property
+    def language_tags(self):
+        return self._tags('language')
+
+class Skill(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(SKILL_SLUG_LENGTH), nullable=False)  # Display form, as first entered
+    slug = db.Column(db.String(SKILL_SLUG_LENGTH), unique=True, nullable=False)  # Normalized form used for matching
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def slug_for(name):
+        """Normalized, length-limited form of a skill name"""
+        return normalize_skill(name)[:SKILL_SLUG_LENGTH]
+    
+    @staticmethod
+    def find(name):
+        """Look up a skill by any spelling that normalizes to the same slug"""
+        return Skill.query.filter_by(slug=Skill.slug_for(name)).first()
+
+class ProfileSkill(db.Model):
+    profile_id = db.Column(db.Integer, db.ForeignKey('profile.id'), primary_key=True)
+    kind = db.Column(db.String(16), primary_key=True)  # "skill", "interest", "language"
+    skill_id = db.Column(db.Integer, db.ForeignKey('skill.id'), primary_key=True)
+    position = db.Column(db.Integer, default=0)
+    
+    skill = db.relationship('Skill', lazy='joined', backref=db.backref('profile_links', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_profile_skill_skill_kind', 'skill_id', 'kind'),
+    )
+
+class CareerPathSkill(db.Model):
+    career_path_id = db.Column(db.Integer, db.ForeignKey('career_path.id'), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skill.id'), primary_key=True)
+    position = db.Column(db.Integer, default=0)
+    
+    skill = db.relationship('Skill', lazy='joined', backref=db.backref('career_path_links', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_career_path_skill_skill', 'skill_id'),
+    )
 
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -107,6 +214,10 @@ class Enrollment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref='enrollments')
+    
+    __table_args__ = (
+        db.Index('ix_enrollment_user_course', 'user_id', 'course_id'),
+    )
 
 class CareerPath(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -116,6 +227,14 @@ class CareerPath(db.Model):
     recommended_courses = db.Column(db.Text)  # Stored as comma-separated course IDs
     job_outlook = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Normalized copy of required_skills, kept in sync on every flush
+    skill_links = db.relationship('CareerPathSkill', backref='career_path', lazy='selectin',
+                                  cascade="all, delete-orphan", order_by='CareerPathSkill.position')
+    
+    @property
+    def skill_tags(self):
+        return [link.skill for link in self.skill_links]
 
 class CareerGoal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -128,6 +247,10 @@ class CareerGoal(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     career_path = db.relationship('CareerPath')
+    
+    __table_args__ = (
+        db.Index('ix_career_goal_user_created', 'user_id', 'created_at'),
+    )
 
 class CodingProblem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -138,6 +261,7 @@ class CodingProblem(db.Model):
     example_input = db.Column(db.Text)
     example_output = db.Column(db.Text)
     test_cases = db.Column(db.Text)  # Stored as JSON
+    test_cases_version = db.Column(db.Integer, default=1, nullable=False)  # Bumped whenever test_cases changes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -148,11 +272,62 @@ class CodingSolution(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     problem_id = db.Column(db.Integer, db.ForeignKey('coding_problem.id'), nullable=False)
     language = db.Column(db.String(32))  # "Python", "JavaScript", etc.
-    code = db.Column(db.Text)
-    status = db.Column(db.String(16))  # "Accepted", "Wrong Answer", "Runtime Error", etc.
+    code = db.Column(db.Text)  # Only set on rows submitted before code_blob existed
+    code_blob_id = db.Column(db.Integer, db.ForeignKey('code_blob.id'))
+    status = db.Column(db.String(32))  # "Accepted", "Wrong Answer", "Time Limit Exceeded", etc.
     runtime = db.Column(db.Integer)  # in milliseconds
     memory_used = db.Column(db.Integer)  # in KB
+    case_results = db.Column(db.Text)  # JSON list of {"index", "passed", "time_ms"}, up to the first failure
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    code_blob = db.relationship('CodeBlob')
+    
+    __table_args__ = (
+        # Recent submissions on the dashboard, and one problem's history
+        db.Index('ix_coding_solution_user_submitted', 'user_id', 'submitted_at'),
+        db.Index('ix_coding_solution_user_problem_submitted', 'user_id', 'problem_id', 'submitted_at'),
+    )
+    
+    @property
+    def source(self):
+        """The submitted code, whether stored inline or deduplicated in a CodeBlob"""
+        return self.code_blob.code if self.code_blob else self.code
+
+class CodeBlob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of the code as submitted
+    code = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class JudgeVerdict(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    problem_id = db.Column(db.Integer, db.ForeignKey('coding_problem.id'), nullable=False)
+    test_cases_version = db.Column(db.Integer, nullable=False)
+    language = db.Column(db.String(32), nullable=False)
+    code_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(32))
+    runtime = db.Column(db.Integer)  # in milliseconds
+    memory_used = db.Column(db.Integer)  # in KB
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('problem_id', 'test_cases_version', 'language', 'code_hash', name='uq_judge_verdict_key'),
+    )
+
+class JudgeJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    solution_id = db.Column(db.Integer, db.ForeignKey('coding_solution.id'), nullable=False, unique=True)
+    status = db.Column(db.String(16), default="queued")  # "queued", "running", "done", "failed"
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    solution = db.relationship('CodingSolution', backref=db.backref('judge_job', uselist=False))
+    
+    __table_args__ = (
+        db.Index('ix_judge_job_status_id', 'status', 'id'),
+    )
 
 class AptitudeTest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -181,11 +356,70 @@ class AptitudeTestResult(db.Model):
     test_id = db.Column(db.Integer, db.ForeignKey('aptitude_test.id'), nullable=False)
     score = db.Column(db.Integer)  # total correct answers
     score_percentage = db.Column(db.Float)  # percentage score
-    answers = db.Column(db.Text)  # JSON of question_id: selected_option
+    answers = db.Column(db.Text)  # Legacy JSON of question_id: selected_option, superseded by answer_bytes
+    answer_bytes = db.Column(db.LargeBinary)  # one byte per question in question_ids order, 0xFF if unanswered
+    correct_bytes = db.Column(db.LargeBinary)  # one byte per question, 1 if answered correctly
+    question_ids = db.Column(db.Text)  # comma-separated ids of the questions the bytes are for, in order
     time_taken = db.Column(db.Integer)  # in seconds
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     test = db.relationship('AptitudeTest')
+    
+    __table_args__ = (
+        db.Index('ix_aptitude_test_result_user_completed', 'user_id', 'completed_at'),
+        db.Index('ix_aptitude_test_result_user_test_completed', 'user_id', 'test_id', 'completed_at'),
+        # Item analysis reads one test's results in id order
+        db.Index('ix_aptitude_test_result_test_id', 'test_id', 'id'),
+    )
+
+class AptitudeTestStats(db.Model):
+    """Running totals over a test's results for item analysis, folded in by item_analysis.py"""
+    test_id = db.Column(db.Integer, db.ForeignKey('aptitude_test.id'), primary_key=True)
+    question_ids = db.Column(db.Text)  # comma-separated ids the per-question rows were built for
+    last_result_id = db.Column(db.Integer, nullable=False, default=0)  # results up to this id are included
+    results_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_histogram = db.Column(db.Text)  # JSON list of result counts per 10% score band
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AptitudeQuestionStats(db.Model):
+    # No foreign key to the question, so questions can still be deleted; stale rows are rebuilt
+    question_id = db.Column(db.Integer, primary_key=True)
+    test_id = db.Column(db.Integer, db.ForeignKey('aptitude_test.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    answered_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_score_sum = db.Column(db.Integer, nullable=False, default=0)  # total scores of results that got it right
+    option_counts = db.Column(db.Text)  # JSON list of how often each option was picked
+
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    easy_solved = db.Column(db.Integer, default=0)
+    medium_solved = db.Column(db.Integer, default=0)
+    hard_solved = db.Column(db.Integer, default=0)
+    submissions = db.Column(db.Integer, default=0)
+    accepted_submissions = db.Column(db.Integer, default=0)
+    tests_taken = db.Column(db.Integer, default=0)
+    best_scores = db.Column(db.Text)  # JSON of test_id: {"category": ..., "percentage": ...}
+    activity = db.Column(db.Text)  # JSON of "YYYY-MM-DD": count, recent days only
+    current_streak = db.Column(db.Integer, default=0)  # consecutive active days ending last_active_date
+    longest_streak = db.Column(db.Integer, default=0)
+    last_active_date = db.Column(db.Date)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    user = db.relationship('User', backref=db.backref('stats', uselist=False, cascade="all, delete-orphan"))
+    
+    @property
+    def problems_solved(self):
+        return (self.easy_solved or 0) + (self.medium_solved or 0) + (self.hard_solved or 0)
+    
+    @property
+    def active_streak(self):
+        """The streak as of today; it lapses once a full day passes without activity"""
+        if not self.last_active_date or (datetime.utcnow().date() - self.last_active_date).days > 1:
+            return 0
+        return self.current_streak or 0
 
 class AiChatMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -195,3 +429,116 @@ class AiChatMessage(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref='ai_chat_messages')
+    
+    __table_args__ = (
+        # The chat page pages by (created_at, id); the advisor context reads by id
+        db.Index('ix_ai_chat_message_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_ai_chat_message_user_id', 'user_id', 'id'),
+    )
+
+class AdvisorSummary(db.Model):
+    """Rolling summary of the advisor conversation older than the recent-message window"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    summary = db.Column(db.Text)  # JSON list of short notes, oldest first
+    summarized_through_id = db.Column(db.Integer, nullable=False, default=0)  # last AiChatMessage id folded in
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CacheVersion(db.Model):
+    """Shared version counter for a cached catalog, bumped whenever its rows change"""
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+@event.listens_for(CodingProblem.test_cases, 'set', active_history=True)
+def bump_test_cases_version(problem, value, oldvalue, initiator):
+    """Cached verdicts are keyed by test_cases_version, so changing the cases invalidates them."""
+    if oldvalue is NO_VALUE or oldvalue == value or problem.id is None:
+        return
+    problem.test_cases_version = (problem.test_cases_version or 1) + 1
+    
+    from verdict_cache import verdict_cache
+    verdict_cache.invalidate_problem(problem.id)
+
+
+# Text columns mirrored into skill link rows: {model: {column: kind}}
+SKILL_TEXT_COLUMNS = {
+    'Profile': {'skills': 'skill', 'areas_of_interest': 'interest', 'languages_known': 'language'},
+    'CareerPath': {'required_skills': 'skill'},
+}
+
+def sync_skill_links(session, obj, skill_cache=None):
+    """Rebuild obj.skill_links from its comma-separated text columns."""
+    if skill_cache is None:
+        skill_cache = {}
+    columns = SKILL_TEXT_COLUMNS[type(obj).__name__]
+    existing = {(getattr(link, 'kind', 'skill'), link.skill.slug): link for link in obj.skill_links}
+    links = {}
+    
+    with session.no_autoflush:
+        for column, kind in columns.items():
+            for position, name in enumerate(split_skills(getattr(obj, column))):
+                slug = Skill.slug_for(name)
+                if (kind, slug) in links:
+                    # Overlong names that only differ past the slug length are one skill
+                    continue
+                link = existing.get((kind, slug))
+                if link is None:
+                    skill = skill_cache.get(slug) or Skill.query.filter_by(slug=slug).first()
+                    if skill is None:
+                        skill = Skill(name=name[:SKILL_SLUG_LENGTH], slug=slug)
+                        session.add(skill)
+                    skill_cache[slug] = skill
+                    if isinstance(obj, Profile):
+                        link = ProfileSkill(kind=kind, skill=skill)
+                    else:
+                        link = CareerPathSkill(skill=skill)
+                link.position = position
+                links[(kind, slug)] = link
+    
+    obj.skill_links = list(links.values())
+
+def _sync_changed_skill_links(session, flush_context, instances):
+    """Keep skill link rows in step with edits to the comma-separated columns."""
+    skill_cache = {}
+    for obj in list(session.new) + list(session.dirty):
+        columns = SKILL_TEXT_COLUMNS.get(type(obj).__name__)
+        if not columns:
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(state.attrs[column].history.has_changes() for column in columns):
+            sync_skill_links(session, obj, skill_cache)
+
+event.listen(Session, 'before_flush', _sync_changed_skill_links)
+
+
+# Cached catalogs and the models whose rows they are built from
+CATALOG_MODELS = {
+    'CareerPath': 'career_paths',
+    'CareerPathSkill': 'career_paths',
+    'AptitudeTest': 'aptitude_tests',
+    'AptitudeQuestion': 'aptitude_tests',
+    'CodingProblem': 'coding_problems',
+    'Course': 'courses',
+}
+
+def bump_cache_versions(connection, names):
+    """Increment the shared version of each named catalog, creating the row the first time."""
+    table = CacheVersion.__table__
+    now = datetime.utcnow()
+    for name in sorted(names):
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        )
+        if not result.rowcount:
+            connection.execute(table.insert().values(name=name, version=1, updated_at=now))
+
+def _bump_changed_catalogs(session, flush_context):
+    """Bump catalog versions in the same transaction as the rows that changed."""
+    changed = list(session.new) + list(session.deleted) + [obj for obj in session.dirty if session.is_modified(obj)]
+    names = {CATALOG_MODELS[type(obj).__name__] for obj in changed if type(obj).__name__ in CATALOG_MODELS}
+    if names:
+        bump_cache_versions(session.connection(), names)
+        session.info.setdefault('changed_catalogs', set()).update(names)
+
+event.listen(Session, 'after_flush', _bump_changed_catalogs)
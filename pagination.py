@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import date
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+class KeysetPage:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row on a page as an opaque token."""
+    payload = [value.isoformat() if isinstance(value, date) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def _cursor_value(column, value):
+    """Convert one decoded cursor value to its column's Python type; raises ValueError if it cannot be."""
+    if value is None:
+        return None
+    if isinstance(value, (dict, list, bool)):
+        raise ValueError('cursor values must be scalars')
+    python_type = column.type.python_type
+    if isinstance(value, python_type):
+        return value
+    if issubclass(python_type, date):
+        # datetime and date both parse what encode_cursor wrote
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor for the given sort columns, or return None if it is invalid."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            return None
+        return [_cursor_value(column, value) for column, value in zip(columns, payload)]
+    except (ValueError, TypeError, OverflowError, NotImplementedError):
+        return None
+
+def _after(columns, values, descending):
+    """Rows strictly after `values` in (columns) order, expanded for portability."""
+    clauses = []
+    for i, column in enumerate(columns):
+        compare = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], compare))
+    return or_(*clauses)
+
+def get_page_size(default=DEFAULT_PAGE_SIZE):
+    """Page size requested via ?limit=, clamped to MAX_PAGE_SIZE."""
+    return max(1, min(request.args.get('limit', default, type=int), MAX_PAGE_SIZE))
+
+def keyset_paginate(query, columns, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+    """Return a KeysetPage of query ordered by columns, starting after cursor.
+
+    The last column must be unique (normally the primary key) so the
+    ordering is stable and no row is skipped or repeated between pages.
+    """
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        query = query.filter(_after(columns, values, descending))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return KeysetPage(rows, next_cursor)
+
+def keyset_paginate_records(records, columns, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Like keyset_paginate, for in-memory records already sorted ascending by columns."""
+    values = decode_cursor(cursor, columns)
+    key = lambda record: tuple(getattr(record, column.key) for column in columns)
+    if values is not None:
+        try:
+            records = [record for record in records if key(record) > tuple(values)]
+        except TypeError:
+            records = []
+
+    rows = list(records[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Werkzeug method string, e.g. "scrypt", "scrypt:16384:8:1" or "pbkdf2:sha256:600000"
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+# Hashes computed at once in this process (hashlib releases the GIL, so each
+# takes a core), and how many more may wait before callers are turned away
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 16))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+# Sign-in attempts allowed per window: failures per account, attempts per client address
+LOGIN_WINDOW_SECONDS = int(os.environ.get("LOGIN_WINDOW_SECONDS", 900))
+LOGIN_ACCOUNT_FAILURES = int(os.environ.get("LOGIN_ACCOUNT_FAILURES", 10))
+LOGIN_IP_ATTEMPTS = int(os.environ.get("LOGIN_IP_ATTEMPTS", 50))
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued in this process."""
+
+class RateLimiter:
+    """Fixed-window counters per key, kept in memory for this process."""
+
+    def __init__(self, limit, window, maxsize=100000):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _current(self, key, now):
+        entry = self._counts.get(key)
+        if entry is None or entry[0] + self.window <= now:
+            return None
+        return entry
+
+    def allowed(self, key):
+        with self._lock:
+            entry = self._current(key, time.monotonic())
+            return entry is None or entry[1] < self.limit
+
+    def hit(self, key):
+        """Count an attempt; returns False once the key is over its limit."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._current(key, now)
+            if entry is None:
+                if len(self._counts) >= self.maxsize:
+                    for stale in [k for k, (start, _) in self._counts.items() if start + self.window <= now]:
+                        del self._counts[stale]
+                    while len(self._counts) >= self.maxsize:
+                        del self._counts[next(iter(self._counts))]
+                entry = (now, 0)
+            entry = (entry[0], entry[1] + 1)
+            self._counts[key] = entry
+            return entry[1] <= self.limit
+
+    def reset(self, key):
+        with self._lock:
+            self._counts.pop(key, None)
+
+account_failures = RateLimiter(LOGIN_ACCOUNT_FAILURES, LOGIN_WINDOW_SECONDS)
+ip_attempts = RateLimiter(LOGIN_IP_ATTEMPTS, LOGIN_WINDOW_SECONDS)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+_method_prefix = None
+
+def _run(func, *args):
+    """Run a hash on the executor, waiting for the result in the request thread."""
+    if not _pending.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = _executor.submit(func, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except TimeoutError:
+        raise HashingBusy()
+
+def hash_password(password):
+    """Hash a password with the configured method."""
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with different parameters than the configured ones."""
+    global _method_prefix
+    if _method_prefix is None:
+        # Werkzeug fills in default parameters, so compare against a real hash's prefix
+        _method_prefix = _run(generate_password_hash, '', PASSWORD_HASH_METHOD, 1).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _method_prefix
+
+def login_allowed(email, ip):
+    """Count a sign-in attempt from `ip`; False if the account or address is over its limit."""
+    return account_failures.allowed(email.lower()) and ip_attempts.hit(ip)
+
+def record_login_failure(email):
+    account_failures.hit(email.lower())
+
+def record_login_success(email):
+    account_failures.reset(email.lower())
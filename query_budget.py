@@ -0,0 +1,73 @@
+import logging
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = 10
+
+class QueryBudgetExceeded(Exception):
+    """Raised under app.testing when a page runs more queries than its budget."""
+
+def query_budget(limit):
+    """Set the maximum number of SQL queries a view may run (checked in debug and testing)."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+@contextmanager
+def uncounted():
+    """Leave the queries run inside out of the page's count, for one-off catch-up work."""
+    if not has_request_context() or 'query_count' not in g:
+        yield
+        return
+    count = g.query_count
+    try:
+        yield
+    finally:
+        g.query_count = count
+
+def _counting_enabled(app):
+    return app.debug or app.testing
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+
+def configure_query_budget(app):
+    """Count queries per request and report pages that go over budget.
+
+    Each response gets an X-Query-Count header. Pages are held to
+    QUERY_BUDGET unless their view sets its own with @query_budget. Over
+    budget, debug mode logs a warning and testing mode raises
+    QueryBudgetExceeded.
+    """
+    app.config.setdefault('QUERY_BUDGET', DEFAULT_QUERY_BUDGET)
+    event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    @app.before_request
+    def start_query_count():
+        if _counting_enabled(current_app):
+            g.query_count = 0
+
+    @app.after_request
+    def check_query_budget(response):
+        if 'query_count' not in g:
+            return response
+        count = g.query_count
+        response.headers['X-Query-Count'] = str(count)
+
+        # Form posts only have a budget when their view declares one
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is None and request.method in ('GET', 'HEAD'):
+            budget = current_app.config['QUERY_BUDGET']
+        if budget is not None and count > budget:
+            message = '%s ran %d queries (budget %d)' % (request.endpoint, count, budget)
+            if current_app.testing:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
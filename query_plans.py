@@ -0,0 +1,56 @@
+import re
+from sqlalchemy import event
+from app import db
+
+# Tables that grow with every user's activity; a full scan of one fails the check
+HISTORY_TABLES = ('aptitude_test_result', 'coding_solution', 'ai_chat_message', 'career_goal', 'enrollment')
+
+def route_urls(app):
+    """GET routes that take no URL arguments."""
+    return sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and not rule.arguments and rule.endpoint != 'static'
+    )
+
+def capture_route_statements(app, user_id, urls):
+    """Request each URL as the given user; returns {statement: (url, parameters)} for every SELECT run."""
+    statements = {}
+    current_url = [None]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            statements.setdefault(statement, (current_url[0], parameters))
+
+    client = app.test_client()
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        for url in urls:
+            # Signed in again for every page, since one of them may be /logout
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+                session['_fresh'] = True
+            current_url[0] = url
+            # A fresh app context per page, so each gets its own session and g as a real request would
+            with app.app_context():
+                client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    return statements
+
+def explain(statement, parameters):
+    """The query plan for a statement, one string per line."""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            # Small development tables make sequential scans look cheap; ask whether an index could be used
+            conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            return [row[0] for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+        return [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+def full_scans(plan):
+    """History tables a plan reads in full."""
+    scanned = []
+    for line in plan:
+        match = re.search(r'Seq Scan on "?(\w+)', line) or re.match(r'\s*SCAN "?(\w+)', line)
+        if match and match.group(1) in HISTORY_TABLES:
+            scanned.append(match.group(1))
+    return scanned
@@ -0,0 +1,91 @@
+from collections import namedtuple
+from operator import eq
+from models import AptitudeQuestion
+from catalog import catalog_cache
+from utils import parse_json_string
+
+# Selected option for a question that was left blank, and its stored byte
+UNANSWERED = -1
+UNANSWERED_BYTE = 0xFF
+
+Question = namedtuple('Question', 'id question_text options correct_option explanation')
+
+class QuestionBank:
+    """Pre-decoded, read-only questions of one aptitude test, with its answer key."""
+
+    __slots__ = ('test_id', 'questions', 'answer_key', 'layout')
+
+    def __init__(self, test_id, questions):
+        self.test_id = test_id
+        self.questions = tuple(questions)
+        self.answer_key = tuple(question.correct_option for question in self.questions)
+        # Comma-separated question ids, the order answer bytes are stored in
+        self.layout = ','.join(str(question.id) for question in self.questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def read_answers(self, form):
+        """Selected option index per question from a submitted test form, in question order."""
+        selected = []
+        for question in self.questions:
+            try:
+                choice = int(form.get('q%d' % question.id, UNANSWERED))
+            except ValueError:
+                choice = UNANSWERED
+            selected.append(choice if 0 <= choice < len(question.options) else UNANSWERED)
+        return selected
+
+    def correct(self, selected):
+        """Per-question correctness of `selected` against the answer key."""
+        return list(map(eq, selected, self.answer_key))
+
+    def grade(self, selected):
+        """Number of correct answers in `selected`."""
+        return sum(self.correct(selected))
+
+    def align(self, data, layout, fill):
+        """Per-question bytes stored in `layout` order, rearranged into this bank's question order.
+
+        Questions added since are filled with `fill`; removed ones are dropped.
+        """
+        width = len(self.questions)
+        if layout is None or layout == self.layout:
+            return data[:width].ljust(width, bytes([fill]))
+        positions = {int(question_id): position for position, question_id in enumerate(layout.split(',')) if question_id}
+        aligned = []
+        for question in self.questions:
+            position = positions.get(question.id)
+            aligned.append(data[position] if position is not None and position < len(data) else fill)
+        return bytes(aligned)
+
+    def selected_answers(self, result):
+        """Selected option per question for a stored result, in question order."""
+        if result.answer_bytes is not None:
+            return decode_answers(self.align(result.answer_bytes, result.question_ids, UNANSWERED_BYTE))
+        # Results saved before answer_bytes existed
+        answers = parse_json_string(result.answers)
+        return [int(answers.get(str(question.id), UNANSWERED)) for question in self.questions]
+
+def encode_answers(selected):
+    """Pack selected options into one byte per question."""
+    return bytes(UNANSWERED_BYTE if choice == UNANSWERED else choice for choice in selected)
+
+def decode_answers(data):
+    """Unpack answer bytes into selected option indexes."""
+    return [UNANSWERED if byte == UNANSWERED_BYTE else byte for byte in data]
+
+def encode_correct(correct):
+    """Pack per-question correctness into one byte (0 or 1) per question."""
+    return bytes(map(int, correct))
+
+def _load_question_bank(test_id):
+    questions = AptitudeQuestion.query.filter_by(test_id=test_id).order_by(AptitudeQuestion.id).all()
+    return QuestionBank(test_id, [
+        Question(q.id, q.question_text, tuple(parse_json_string(q.options) or ()), q.correct_option, q.explanation)
+        for q in questions
+    ])
+
+def get_question_bank(test_id):
+    """The cached question bank for a test, rebuilt only when aptitude tests change."""
+    return catalog_cache.get('aptitude_tests', lambda: _load_question_bank(test_id), key=('question_bank', test_id))
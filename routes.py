@@ -1,6 +1,6 @@
 import json
 import os
-from flask import render_template, url_for, flash, redirect, request, jsonify
+from flask import render_template, url_for, flash, redirect, request, jsonify, abort, Response, stream_with_context, g
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, date
@@ -8,18 +8,43 @@ from app import db
 from models import (
     User, Profile, Course, Enrollment, CareerPath, CareerGoal, 
     CodingProblem, CodingSolution, AptitudeTest, AptitudeQuestion, 
-    AptitudeTestResult, AiChatMessage
+    AptitudeTestResult, AiChatMessage, UserStats
 )
 from forms import (
     RegistrationForm, LoginForm, ProfileForm, CareerGoalForm, 
     CodingSolutionForm, AIChatForm, ResetPasswordRequestForm, ResetPasswordForm
 )
 from utils import (
-    get_career_match_score, parse_json_string, format_datetime, 
-    evaluate_code_solution, get_coding_problems_sample_data,
-    get_aptitude_test_sample_data, get_career_paths_sample_data,
-    get_ai_advisor_response
+    parse_json_string, format_datetime
 )
+from submissions import enqueue_submission, filter_problems_by_status, get_problem_progress, PENDING
+from skill_index import get_skill_index
+from search import search_courses, paginate
+from pagination import keyset_paginate, keyset_paginate_records, get_page_size
+from catalog import get_career_paths, get_career_path_choices, get_aptitude_test, get_aptitude_tests, get_coding_problems
+from http_cache import conditional_page, cached_fragment
+from question_bank import get_question_bank, encode_answers, encode_correct
+from item_analysis import update_item_statistics, item_report
+from advisor import stream_reply, format_event, AdvisorBusy, AdvisorTimeout
+from advisor_context import build_advisor_context, record_message
+from user_stats import get_user_stats, record_submission, record_test_result, activity_series, category_scores
+from user_cache import invalidate_user
+from passwords import HashingBusy, ip_attempts, login_allowed, record_login_failure, record_login_success
+from query_budget import query_budget, uncounted
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
+
+def _user_enrollments():
+    """The current user's enrollments by course id, loaded once per request."""
+    if 'user_enrollments' not in g:
+        g.user_enrollments = {e.course_id: e for e in Enrollment.query.filter_by(user_id=current_user.id)}
+    return g.user_enrollments
+
+def _enrollment_state():
+    """The user's enrollments as the course list shows them, for its ETag."""
+    return repr(sorted(
+        (e.course_id, e.status, e.grade, e.completed_date) for e in _user_enrollments().values()
+    ))
 
 def configure_routes(app):
     
@@ -34,30 +59,38 @@ def configure_routes(app):
         
         form = RegistrationForm()
         if form.validate_on_submit():
-            # Check if username or email already exists
-            existing_user = User.query.filter_by(username=form.username.data).first()
-            if existing_user:
-                flash('Username already taken. Please choose a different one.', 'danger')
-                return render_template('register.html', title='Register', form=form)
-            
-            existing_email = User.query.filter_by(email=form.email.data).first()
-            if existing_email:
-                flash('Email already registered. Please use a different one or login.', 'danger')
-                return render_template('register.html', title='Register', form=form)
+            # Hashing is expensive, so registrations share the per-address attempt limit
+            if not ip_attempts.hit(request.remote_addr):
+                flash('Too many attempts. Please wait a few minutes and try again.', 'danger')
+                return render_template('register.html', title='Register', form=form), 429
             
-            # Create new user
+            # Create new user; the unique constraints on username and email decide duplicates
             user = User(
                 username=form.username.data,
-                email=form.email.data
+                email=form.email.data.strip().lower()
             )
-            user.set_password(form.password.data)
+            try:
+                user.set_password(form.password.data)
+            except HashingBusy:
+                flash('Sign-in is busy right now. Please try again in a moment.', 'warning')
+                return render_template('register.html', title='Register', form=form), 503
             
-            # Create empty profile
+            # Create empty profile, and a stats row so it never needs rebuilding from history
             profile = Profile(user=user)
+            stats = UserStats(user=user)
             
             db.session.add(user)
             db.session.add(profile)
-            db.session.commit()
+            db.session.add(stats)
+            try:
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                if 'username' in str(e.orig):
+                    flash('Username already taken. Please choose a different one.', 'danger')
+                else:
+                    flash('Email already registered. Please use a different one or login.', 'danger')
+                return render_template('register.html', title='Register', form=form)
             
             flash('Account created successfully! You can now log in.', 'success')
             return redirect(url_for('login'))
@@ -71,14 +104,30 @@ def configure_routes(app):
         
         form = LoginForm()
         if form.validate_on_submit():
-            user = User.query.filter_by(email=form.email.data).first()
+            # Throttle before hashing, so repeated guesses cannot tie up the hashing workers
+            if not login_allowed(form.email.data, request.remote_addr):
+                flash('Too many sign-in attempts. Please wait a few minutes and try again.', 'danger')
+                return render_template('login.html', title='Login', form=form), 429
+            
+            user = User.find_by_email(form.email.data)
             
-            if user and user.check_password(form.password.data):
+            try:
+                authenticated = user is not None and user.check_password(form.password.data)
+                if authenticated and user.upgrade_password_hash(form.password.data):
+                    db.session.commit()
+                    invalidate_user(user.id)
+            except HashingBusy:
+                flash('Sign-in is busy right now. Please try again in a moment.', 'warning')
+                return render_template('login.html', title='Login', form=form), 503
+            
+            if authenticated:
+                record_login_success(form.email.data)
                 login_user(user, remember=form.remember.data)
                 next_page = request.args.get('next')
                 flash('Login successful!', 'success')
                 return redirect(next_page) if next_page else redirect(url_for('dashboard'))
             else:
+                record_login_failure(form.email.data)
                 flash('Login unsuccessful. Please check email and password.', 'danger')
         
         return render_template('login.html', title='Login', form=form)
@@ -91,21 +140,31 @@ def configure_routes(app):
     
     @app.route('/dashboard')
     @login_required
+    @query_budget(6)
     def dashboard():
         # Get user profile data
         profile = current_user.profile
         
         # Get career goals
-        career_goals = CareerGoal.query.filter_by(user_id=current_user.id).all()
+        # The paths' skill links are not shown here, so skip their select-in load
+        career_goals = CareerGoal.query.options(
+            joinedload(CareerGoal.career_path).lazyload(CareerPath.skill_links)
+        ).filter_by(user_id=current_user.id).all()
         
         # Get recent aptitude test results
-        test_results = AptitudeTestResult.query.filter_by(user_id=current_user.id).order_by(AptitudeTestResult.completed_at.desc()).limit(3).all()
+        test_results = AptitudeTestResult.query.options(
+            joinedload(AptitudeTestResult.test)
+        ).filter_by(user_id=current_user.id).order_by(AptitudeTestResult.completed_at.desc()).limit(3).all()
         
         # Get recent coding activities
-        coding_solutions = CodingSolution.query.filter_by(user_id=current_user.id).order_by(CodingSolution.submitted_at.desc()).limit(3).all()
+        coding_solutions = CodingSolution.query.options(
+            joinedload(CodingSolution.problem)
+        ).filter_by(user_id=current_user.id).order_by(CodingSolution.submitted_at.desc()).limit(3).all()
         
-        # For a new application, let's populate with sample data if DB is empty
-        initialize_sample_data_if_needed()
+        # Aggregates for the stats cards and charts come from one row
+        stats = get_user_stats(current_user.id)
+        activity_labels, activity_counts = activity_series(stats)
+        score_categories, score_values = category_scores(stats)
         
         return render_template(
             'dashboard.html', 
@@ -113,7 +172,12 @@ def configure_routes(app):
             profile=profile,
             career_goals=career_goals,
             test_results=test_results,
-            coding_solutions=coding_solutions
+            coding_solutions=coding_solutions,
+            stats=stats,
+            activity_labels=activity_labels,
+            activity_counts=activity_counts,
+            score_categories=score_categories,
+            score_values=score_values
         )
     
     @app.route('/profile', methods=['GET', 'POST'])
@@ -159,6 +223,7 @@ def configure_routes(app):
             current_user.profile.instagram_url = form.instagram_url.data
             
             db.session.commit()
+            invalidate_user(current_user.id)
             flash('Your profile has been updated!', 'success')
             return redirect(url_for('profile'))
         
@@ -200,6 +265,8 @@ def configure_routes(app):
     
     @app.route('/courses')
     @login_required
+    @query_budget(4)
+    @conditional_page('courses', user_state=_enrollment_state)
     def courses():
         # Get all courses
         course_query = Course.query
@@ -209,12 +276,7 @@ def configure_routes(app):
         department = request.args.get('department', '')
         level = request.args.get('level', '')
         
-        if search:
-            course_query = course_query.filter(
-                (Course.title.contains(search)) | 
-                (Course.code.contains(search)) | 
-                (Course.description.contains(search))
-            )
+        page = request.args.get('page', 1, type=int)
         
         if department:
             course_query = course_query.filter_by(department=department)
@@ -222,33 +284,42 @@ def configure_routes(app):
         if level:
             course_query = course_query.filter_by(level=level)
         
-        # Get user enrollments for display
-        user_enrollments = {e.course_id: e for e in current_user.enrollments}
+        # Full-text search results are ranked and paginated by page number;
+        # the plain catalog is paginated by keyset in creation order
+        has_next = False
+        if search:
+            courses, has_next = paginate(search_courses(course_query, search), page)
+        else:
+            courses = keyset_paginate(
+                course_query, (Course.created_at, Course.id),
+                cursor=request.args.get('cursor'), limit=get_page_size()
+            )
         
-        courses = course_query.all()
         return render_template(
             'courses.html', 
             title='Courses',
             courses=courses,
-            user_enrollments=user_enrollments,
+            user_enrollments=_user_enrollments(),
             search=search,
             department=department,
-            level=level
+            level=level,
+            page=page,
+            has_next=has_next
         )
     
     @app.route('/career-paths')
     @login_required
+    @conditional_page('career_paths')
     def career_paths():
-        career_paths = CareerPath.query.all()
+        career_paths = get_career_paths()
         
-        # Calculate match scores if user has skills
+        # Rank paths by match score if user has skills
         match_scores = {}
         if current_user.profile and current_user.profile.skills:
-            for path in career_paths:
-                match_scores[path.id] = get_career_match_score(
-                    current_user.profile.skills, 
-                    path.required_skills
-                )
+            ranked = get_skill_index(career_paths).top_k(current_user.profile.skills, k=len(career_paths))
+            match_scores = dict(ranked)
+            rank = {path_id: position for position, (path_id, _) in enumerate(ranked)}
+            career_paths = sorted(career_paths, key=lambda path: rank[path.id])
         
         return render_template(
             'career_paths.html', 
@@ -263,8 +334,7 @@ def configure_routes(app):
         form = CareerGoalForm()
         
         # Populate career path choices
-        career_paths = CareerPath.query.all()
-        form.career_path_id.choices = [(0, 'Custom Goal')] + [(path.id, path.name) for path in career_paths]
+        form.career_path_id.choices = get_career_path_choices()
         
         if form.validate_on_submit():
             career_goal = CareerGoal(
@@ -300,8 +370,7 @@ def configure_routes(app):
         form = CareerGoalForm()
         
         # Populate career path choices
-        career_paths = CareerPath.query.all()
-        form.career_path_id.choices = [(0, 'Custom Goal')] + [(path.id, path.name) for path in career_paths]
+        form.career_path_id.choices = get_career_path_choices()
         
         if form.validate_on_submit():
             if form.career_path_id.data > 0:
@@ -328,37 +397,42 @@ def configure_routes(app):
     @app.route('/coding-practice')
     @login_required
     def coding_practice():
-        # Get all coding problems
-        problem_query = CodingProblem.query
-        
         # Apply filters if provided
         difficulty = request.args.get('difficulty', '')
         topic = request.args.get('topic', '')
         status = request.args.get('status', '')
+        order = (CodingProblem.created_at, CodingProblem.id)
+        
+        if status:
+            # Status depends on the user's solutions, so filter in SQL to keep pages full
+            problem_query = CodingProblem.query
+            if difficulty:
+                problem_query = problem_query.filter_by(difficulty=difficulty)
+            if topic:
+                problem_query = problem_query.filter_by(topic=topic)
+            problem_query = filter_problems_by_status(problem_query, current_user.id, status)
+            problem_page = keyset_paginate(
+                problem_query, order, cursor=request.args.get('cursor'), limit=get_page_size()
+            )
+        else:
+            # Otherwise page through the cached catalog
+            problems = [
+                p for p in get_coding_problems()
+                if (not difficulty or p.difficulty == difficulty) and (not topic or p.topic == topic)
+            ]
+            problem_page = keyset_paginate_records(
+                problems, order, cursor=request.args.get('cursor'), limit=get_page_size()
+            )
+        problems = problem_page.items
         
-        if difficulty:
-            problem_query = problem_query.filter_by(difficulty=difficulty)
-            
-        if topic:
-            problem_query = problem_query.filter_by(topic=topic)
-        
-        problems = problem_query.all()
-        
-        # Get user solutions for display
-        user_solutions = {s.problem_id: s for s in CodingSolution.query.filter_by(user_id=current_user.id).all()}
-        
-        # Filter by status if requested
-        if status == 'solved':
-            problems = [p for p in problems if p.id in user_solutions and user_solutions[p.id].status == 'Accepted']
-        elif status == 'attempted':
-            problems = [p for p in problems if p.id in user_solutions]
-        elif status == 'unsolved':
-            problems = [p for p in problems if p.id not in user_solutions]
+        # Best status per problem on this page, aggregated in the database
+        user_solutions = get_problem_progress(current_user.id, [p.id for p in problems])
         
         return render_template(
             'coding_practice.html', 
             title='Coding Practice',
             problems=problems,
+            problem_page=problem_page,
             user_solutions=user_solutions,
             difficulty=difficulty,
             topic=topic,
@@ -395,86 +469,110 @@ def configure_routes(app):
             problem_id = form.problem_id.data
             problem = CodingProblem.query.get_or_404(problem_id)
             
-            # Evaluate the submitted code
-            result = evaluate_code_solution(
-                problem=problem,
-                code=form.code.data,
-                language=form.language.data
-            )
-            
-            # Save the solution
-            solution = CodingSolution(
+            # Queue the solution; a judge worker picks it up and records the verdict
+            record_submission(current_user.id)
+            solution = enqueue_submission(
                 user_id=current_user.id,
-                problem_id=problem_id,
+                problem=problem,
                 language=form.language.data,
-                code=form.code.data,
-                status=result['status'],
-                runtime=result['runtime'],
-                memory_used=result['memory_used']
+                code=form.code.data
             )
-            
-            db.session.add(solution)
             db.session.commit()
             
-            flash(f'Solution submitted! Status: {result["status"]}', 'info')
+            if solution.status == PENDING:
+                flash('Solution submitted! Your code is being judged.', 'info')
+            else:
+                flash(f'Solution submitted! Status: {solution.status}', 'info')
             return redirect(url_for('view_problem', problem_id=problem_id))
         
         flash('There was an error with your submission.', 'danger')
         return redirect(url_for('coding_practice'))
     
+    @app.route('/solution/<int:solution_id>/status')
+    @login_required
+    def solution_status(solution_id):
+        solution = CodingSolution.query.get_or_404(solution_id)
+        
+        # Check if the solution belongs to the current user
+        if solution.user_id != current_user.id:
+            return jsonify({'error': 'Not found'}), 404
+        
+        return jsonify({
+            'id': solution.id,
+            'status': solution.status,
+            'pending': solution.status == PENDING,
+            'runtime': solution.runtime,
+            'memory_used': solution.memory_used,
+            'cases': json.loads(solution.case_results) if solution.case_results else []
+        })
+    
     @app.route('/aptitude-tests')
     @login_required
+    @query_budget(4)
     def aptitude_tests():
-        # Get all aptitude tests
-        tests = AptitudeTest.query.all()
+        tests = keyset_paginate_records(
+            get_aptitude_tests(), (AptitudeTest.created_at, AptitudeTest.id),
+            cursor=request.args.get('cursor'), limit=get_page_size()
+        )
         
-        # Get user's test results
+        # Get user's latest result for each test on this page
         user_results = {}
-        for result in AptitudeTestResult.query.filter_by(user_id=current_user.id).all():
+        for result in AptitudeTestResult.query.options(
+            joinedload(AptitudeTestResult.test)
+        ).filter(
+            AptitudeTestResult.user_id == current_user.id,
+            AptitudeTestResult.test_id.in_([t.id for t in tests])
+        ).order_by(AptitudeTestResult.completed_at).all():
             user_results[result.test_id] = result
         
+        # Best score per category for the chart, from the user's stats row
+        score_categories, score_values = category_scores(get_user_stats(current_user.id))
+        
         return render_template(
             'aptitude_tests.html', 
             title='Aptitude Tests',
             tests=tests,
-            user_results=user_results
+            user_results=user_results,
+            score_categories=score_categories,
+            score_values=score_values
         )
     
     @app.route('/take-test/<int:test_id>')
     @login_required
+    @conditional_page('aptitude_tests')
     def take_test(test_id):
-        test = AptitudeTest.query.get_or_404(test_id)
-        questions = AptitudeQuestion.query.filter_by(test_id=test_id).all()
+        test = get_aptitude_test(test_id)
+        if test is None:
+            abort(404)
+        
+        # The test itself is the same for everyone, so it is rendered once per change
+        test_content = cached_fragment(
+            'aptitude_tests', test_id, 'fragments/test_taking.html',
+            lambda: {'test': test, 'questions': get_question_bank(test_id).questions}
+        )
         
         return render_template(
             'test_taking.html',
             title=f'Test: {test.category}',
-            test=test,
-            questions=questions
+            test_content=test_content
         )
     
     @app.route('/submit-test/<int:test_id>', methods=['POST'])
     @login_required
     def submit_test(test_id):
-        test = AptitudeTest.query.get_or_404(test_id)
-        questions = AptitudeQuestion.query.filter_by(test_id=test_id).all()
-        
-        # Process answers
-        answers = {}
-        score = 0
-        
-        for question in questions:
-            selected_option = request.form.get(f'q{question.id}')
-            if selected_option:
-                answer_index = int(selected_option)
-                answers[question.id] = answer_index
-                
-                # Check if answer is correct
-                if answer_index == question.correct_option:
-                    score += 1
+        test = get_aptitude_test(test_id)
+        if test is None:
+            abort(404)
+        bank = get_question_bank(test_id)
+        
+        # Grade every answer against the test's answer key at once
+        selected = bank.read_answers(request.form)
+        correct = bank.correct(selected)
+        score = sum(correct)
         
         # Calculate score percentage
-        score_percentage = (score / len(questions)) * 100 if questions else 0
+        score_percentage = (score / len(bank)) * 100 if len(bank) else 0
+        record_test_result(current_user.id, test, score_percentage)
         
         # Save test result
         test_result = AptitudeTestResult(
@@ -482,14 +580,16 @@ def configure_routes(app):
             test_id=test_id,
             score=score,
             score_percentage=score_percentage,
-            answers=json.dumps(answers),
+            answer_bytes=encode_answers(selected),
+            correct_bytes=encode_correct(correct),
+            question_ids=bank.layout,
             time_taken=request.form.get('time_taken', 0)
         )
         
         db.session.add(test_result)
         db.session.commit()
         
-        flash(f'Test submitted! Your score: {score}/{len(questions)} ({score_percentage:.1f}%)', 'info')
+        flash(f'Test submitted! Your score: {score}/{len(bank)} ({score_percentage:.1f}%)', 'info')
         return redirect(url_for('test_results', result_id=test_result.id))
     
     @app.route('/test-results/<int:result_id>')
@@ -502,19 +602,50 @@ def configure_routes(app):
             flash('You do not have permission to view these results.', 'danger')
             return redirect(url_for('aptitude_tests'))
         
-        test = result.test
-        questions = AptitudeQuestion.query.filter_by(test_id=test.id).all()
+        test = get_aptitude_test(result.test_id)
+        bank = get_question_bank(result.test_id)
         
-        # Parse answers
-        answers = parse_json_string(result.answers)
+        # Selected option per question, in question order
+        selected = bank.selected_answers(result)
         
         return render_template(
             'test_results.html',
             title='Test Results',
             result=result,
             test=test,
-            questions=questions,
-            answers=answers
+            questions=bank.questions,
+            selected=selected
+        )
+    
+    @app.route('/admin/item-analysis')
+    @app.route('/admin/item-analysis/<int:test_id>')
+    @login_required
+    def item_analysis(test_id=None):
+        if not current_user.is_admin:
+            abort(403)
+        
+        tests = get_aptitude_tests()
+        if test_id is None and tests:
+            test_id = tests[0].id
+        test = get_aptitude_test(test_id) if test_id is not None else None
+        if test_id is not None and test is None:
+            abort(404)
+        
+        # Fold in results submitted since the last run before reporting
+        reports, histogram, total = [], [], 0
+        if test:
+            with uncounted():
+                update_item_statistics(test_id=test.id)
+            reports, histogram, total = item_report(test.id)
+        
+        return render_template(
+            'item_analysis.html',
+            title='Item Analysis',
+            tests=tests,
+            test=test,
+            reports=reports,
+            histogram=histogram,
+            total=total
         )
     
     @app.route('/ai-advisor', methods=['GET', 'POST'])
@@ -523,6 +654,9 @@ def configure_routes(app):
         form = AIChatForm()
         
         if form.validate_on_submit():
+            # Built first, so the question is not part of its own history
+            context = build_advisor_context(current_user, current_user.profile)
+            
             # Save user message
             user_message = AiChatMessage(
                 user_id=current_user.id,
@@ -530,32 +664,95 @@ def configure_routes(app):
                 message=form.message.data
             )
             db.session.add(user_message)
+            db.session.flush()
+            record_message(user_message)
             
-            # Generate AI response
-            response_text = get_ai_advisor_response(
-                user_message=form.message.data,
-                user_profile=current_user.profile
-            )
+            # Generate AI response (the page's script streams it from ai_advisor_stream instead)
+            try:
+                response_text = ''.join(stream_reply(form.message.data, context))
+            except AdvisorBusy:
+                response_text = None
+                flash('The advisor is busy right now. Please try again in a moment.', 'warning')
+            except AdvisorTimeout:
+                response_text = None
+                flash('The advisor took too long to answer. Please try again.', 'warning')
             
             # Save AI response
-            ai_response = AiChatMessage(
-                user_id=current_user.id,
-                is_user=False,
-                message=response_text
-            )
-            db.session.add(ai_response)
+            if response_text:
+                ai_response = AiChatMessage(
+                    user_id=current_user.id,
+                    is_user=False,
+                    message=response_text
+                )
+                db.session.add(ai_response)
+                db.session.flush()
+                record_message(ai_response)
             db.session.commit()
             
             return redirect(url_for('ai_advisor'))
         
-        # Get conversation history
-        messages = AiChatMessage.query.filter_by(user_id=current_user.id).order_by(AiChatMessage.created_at).all()
+        # Get the most recent part of the conversation; older messages load on demand
+        message_page = keyset_paginate(
+            AiChatMessage.query.filter_by(user_id=current_user.id),
+            (AiChatMessage.created_at, AiChatMessage.id),
+            cursor=request.args.get('before'), limit=get_page_size(), descending=True
+        )
+        messages = list(reversed(message_page.items))
         
         return render_template(
             'ai_advisor.html',
             title='AI Advisor',
             form=form,
-            messages=messages
+            messages=messages,
+            message_page=message_page
+        )
+    
+    @app.route('/ai-advisor/stream', methods=['POST'])
+    @login_required
+    def ai_advisor_stream():
+        form = AIChatForm()
+        if not form.validate_on_submit():
+            return jsonify({'error': 'Please enter a message.', 'errors': form.errors}), 400
+        
+        # Claim a backend slot before anything is saved, so a busy advisor costs nothing
+        context = build_advisor_context(current_user, current_user.profile)
+        try:
+            chunks = stream_reply(form.message.data, context)
+        except AdvisorBusy:
+            return jsonify({'error': 'The advisor is busy right now. Please try again in a moment.'}), 503
+        
+        user_id = current_user.id
+        user_message = AiChatMessage(user_id=user_id, is_user=True, message=form.message.data)
+        db.session.add(user_message)
+        db.session.flush()
+        record_message(user_message)
+        db.session.commit()
+        
+        def events():
+            parts = []
+            try:
+                for chunk in chunks:
+                    parts.append(chunk)
+                    yield format_event('chunk', {'text': chunk})
+            except AdvisorTimeout:
+                yield format_event('error', {'message': 'The advisor took too long to answer. Please try again.'})
+            except Exception:
+                app.logger.exception('Advisor backend failed')
+                yield format_event('error', {'message': 'The advisor could not answer right now. Please try again.'})
+            
+            # Keep whatever part of the reply arrived
+            if parts:
+                ai_response = AiChatMessage(user_id=user_id, is_user=False, message=''.join(parts))
+                db.session.add(ai_response)
+                db.session.flush()
+                record_message(ai_response)
+                db.session.commit()
+            yield format_event('done', {})
+        
+        return Response(
+            stream_with_context(events()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
         )
     
     @app.route('/reset-password-request', methods=['GET', 'POST'])
@@ -565,9 +762,10 @@ def configure_routes(app):
         
         form = ResetPasswordRequestForm()
         if form.validate_on_submit():
-            user = User.query.filter_by(email=form.email.data).first()
+            user = User.find_by_email(form.email.data)
             if user:
                 token = user.get_reset_token()
+                db.session.commit()
                 # In a real application, you would send an email with reset_url
                 # reset_url = url_for('reset_password', token=token, _external=True)
                 
@@ -595,9 +793,17 @@ def configure_routes(app):
         
         form = ResetPasswordForm()
         if form.validate_on_submit():
-            user.set_password(form.password.data)
+            if not ip_attempts.hit(request.remote_addr):
+                flash('Too many attempts. Please wait a few minutes and try again.', 'danger')
+                return render_template('reset_password.html', title='Reset Password', form=form), 429
+            try:
+                user.set_password(form.password.data)
+            except HashingBusy:
+                flash('Sign-in is busy right now. Please try again in a moment.', 'warning')
+                return render_template('reset_password.html', title='Reset Password', form=form), 503
             user.clear_reset_token()
             db.session.commit()
+            invalidate_user(user.id)
             flash('Your password has been updated! You can now login.', 'success')
             return redirect(url_for('login'))
             
@@ -605,55 +811,16 @@ def configure_routes(app):
     
     @app.route('/developer-roadmaps')
     @login_required
+    @conditional_page('career_paths')
     def developer_roadmaps():
         # Get career paths as roadmaps
-        roadmaps = CareerPath.query.all()
+        roadmap_cards = cached_fragment(
+            'career_paths', None, 'fragments/roadmap_cards.html',
+            lambda: {'roadmaps': get_career_paths()}
+        )
         
         return render_template(
             'developer_roadmaps.html',
             title='Developer Roadmaps',
-            roadmaps=roadmaps
+            roadmap_cards=roadmap_cards
         )
-        
-    def initialize_sample_data_if_needed():
-        """Initialize the database with sample data if it's empty."""
-        # Check if we already have data
-        if CareerPath.query.first() is not None:
-            return
-            
-        # Add career paths
-        for path_data in get_career_paths_sample_data():
-            path = CareerPath(**path_data)
-            db.session.add(path)
-        
-        # Add coding problems
-        for problem_data in get_coding_problems_sample_data():
-            problem = CodingProblem(**problem_data)
-            db.session.add(problem)
-        
-        # Add aptitude tests
-        aptitude_data = get_aptitude_test_sample_data()
-        
-        for category, test_data in aptitude_data.items():
-            test = AptitudeTest(
-                category=category.replace('_', ' ').title(),
-                description=test_data['description'],
-                total_questions=test_data['total_questions'],
-                time_limit=test_data['time_limit'],
-                passing_score=test_data['passing_score']
-            )
-            db.session.add(test)
-            db.session.flush()  # Get test ID
-            
-            # Add questions for this test
-            for q_data in test_data['questions']:
-                question = AptitudeQuestion(
-                    test_id=test.id,
-                    question_text=q_data['question_text'],
-                    options=json.dumps(q_data['options']),
-                    correct_option=q_data['correct_option'],
-                    explanation=q_data['explanation']
-                )
-                db.session.add(question)
-        
-        db.session.commit()
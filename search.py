@@ -0,0 +1,100 @@
+import re
+from app import db
+from models import Course
+from sqlalchemy import column, func, literal_column, table, text
+
+COURSE_SEARCH_PAGE_SIZE = 20
+
+# SQLite: an external-content FTS5 table over course, kept current by triggers
+SQLITE_COURSE_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS course_fts USING fts5(
+        title, code, description,
+        content='course', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS course_fts_ai AFTER INSERT ON course BEGIN
+        INSERT INTO course_fts(rowid, title, code, description)
+        VALUES (new.id, new.title, new.code, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_fts_ad AFTER DELETE ON course BEGIN
+        INSERT INTO course_fts(course_fts, rowid, title, code, description)
+        VALUES ('delete', old.id, old.title, old.code, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_fts_au AFTER UPDATE ON course BEGIN
+        INSERT INTO course_fts(course_fts, rowid, title, code, description)
+        VALUES ('delete', old.id, old.title, old.code, old.description);
+        INSERT INTO course_fts(rowid, title, code, description)
+        VALUES (new.id, new.title, new.code, new.description);
+    END""",
+]
+
+# Postgres: a generated, weighted tsvector column with a GIN index
+POSTGRES_COURSE_FTS = [
+    """ALTER TABLE course ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(code, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_course_search_vector ON course USING GIN (search_vector)",
+]
+
+def ensure_course_search_index(conn):
+    """Create the course full-text index on conn's database, if supported."""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'course_fts'"
+        )).first()
+        for statement in SQLITE_COURSE_FTS:
+            conn.execute(text(statement))
+        if not exists:
+            # Index the rows that were there before the FTS table
+            conn.execute(text("INSERT INTO course_fts(course_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_COURSE_FTS:
+            conn.execute(text(statement))
+
+def _search_terms(search):
+    return re.findall(r'\w+', search.lower())
+
+def search_courses(course_query, search):
+    """Restrict course_query to courses matching search, best match first.
+
+    Every term must match, and the last term also matches as a prefix so
+    results update sensibly while the user is still typing.
+    """
+    terms = _search_terms(search)
+    if not terms:
+        return course_query
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        match = ' '.join('"%s"' % term for term in terms[:-1])
+        match = (match + ' "%s"*' % terms[-1]).strip()
+        course_fts = table('course_fts', column('rowid'), column('rank'))
+        return course_query.join(course_fts, course_fts.c.rowid == Course.id).filter(
+            literal_column('course_fts').op('MATCH')(match)
+        ).order_by(course_fts.c.rank, Course.id)
+
+    if dialect == 'postgresql':
+        tsquery = func.to_tsquery('english', ' & '.join(terms[:-1] + [terms[-1] + ':*']))
+        vector = literal_column('course.search_vector')
+        return course_query.filter(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank(vector, tsquery).desc(), Course.id
+        )
+
+    # No full-text support: fall back to substring matching
+    for term in terms:
+        course_query = course_query.filter(
+            (Course.title.contains(term)) |
+            (Course.code.contains(term)) |
+            (Course.description.contains(term))
+        )
+    return course_query.order_by(Course.id)
+
+def paginate(query, page, per_page=COURSE_SEARCH_PAGE_SIZE):
+    """Return (items, has_next) for a 1-based page without running a COUNT."""
+    page = max(page, 1)
+    items = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return items[:per_page], len(items) > per_page
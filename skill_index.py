@@ -0,0 +1,87 @@
+import heapq
+import threading
+
+def normalize_skill(skill):
+    """Canonical form of a skill name: trimmed, lower-case, single-spaced."""
+    return ' '.join(skill.strip().lower().split())
+
+def parse_skills(skills_text):
+    """Split comma-separated skills into unique normalized names, keeping order."""
+    if not skills_text:
+        return []
+    skills = []
+    for skill in skills_text.split(','):
+        skill = normalize_skill(skill)
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+def split_skills(skills_text):
+    """Split comma-separated skills into trimmed display names, one per normalized skill."""
+    if not skills_text:
+        return []
+    names = {}
+    for skill in skills_text.split(','):
+        name = ' '.join(skill.split())
+        if name:
+            names.setdefault(normalize_skill(name), name)
+    return list(names.values())
+
+class SkillIndex:
+    """Skill vocabulary plus a precomputed skill bitset for every career path.
+
+    Each vocabulary entry owns one bit, so a path's required skills are a
+    single integer and matching a user against every path is one AND plus
+    popcount per path, with no string parsing at request time.
+    """
+
+    def __init__(self, paths):
+        self.vocabulary = {}
+        self.path_ids = []
+        self.path_masks = []
+        self.path_sizes = []
+
+        for path_id, required_skills in paths:
+            mask = 0
+            skills = parse_skills(required_skills)
+            for skill in skills:
+                bit = self.vocabulary.setdefault(skill, len(self.vocabulary))
+                mask |= 1 << bit
+            self.path_ids.append(path_id)
+            self.path_masks.append(mask)
+            self.path_sizes.append(len(skills))
+
+    def mask_for(self, skills_text):
+        """Bitset of the given skills; skills no path requires are ignored."""
+        mask = 0
+        for skill in parse_skills(skills_text):
+            bit = self.vocabulary.get(skill)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def scores(self, skills_text):
+        """Return {path_id: match percentage} for every indexed path."""
+        user_mask = self.mask_for(skills_text)
+        return {
+            path_id: ((path_mask & user_mask).bit_count() / size) * 100 if size else 0
+            for path_id, path_mask, size in zip(self.path_ids, self.path_masks, self.path_sizes)
+        }
+
+    def top_k(self, skills_text, k=5):
+        """Return the k best matching (path_id, score) pairs, best first."""
+        return heapq.nlargest(k, self.scores(skills_text).items(), key=lambda item: item[1])
+
+_index = None
+_index_key = None
+_index_lock = threading.Lock()
+
+def get_skill_index(career_paths):
+    """Return the SkillIndex for these paths, rebuilding only when required_skills changed."""
+    global _index, _index_key
+    key = tuple((path.id, path.required_skills) for path in career_paths)
+    with _index_lock:
+        if _index is None or _index_key != key:
+            _index = SkillIndex(key)
+            _index_key = key
+        return _index
@@ -0,0 +1,111 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Stream advisor replies into the chat instead of reloading the page
+    const messageForm = document.querySelector('.message-form[data-stream-url]');
+    if (!messageForm || !window.fetch || !window.TextDecoder) {
+        return;
+    }
+
+    const chatContainer = document.querySelector('.chat-container');
+    const messageInput = messageForm.querySelector('#message');
+    const submitButton = messageForm.querySelector('button[type="submit"]');
+
+    const scrollToBottom = function() {
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    };
+
+    const addMessage = function(isUser, text) {
+        const message = document.createElement('div');
+        message.className = 'chat-message ' + (isUser ? 'user-message' : 'ai-message');
+        message.innerHTML =
+            '<div class="avatar-container">' +
+                '<div class="avatar ' + (isUser ? 'user-avatar' : 'ai-avatar') + '">' +
+                    '<i class="fas ' + (isUser ? 'fa-user' : 'fa-robot') + '"></i>' +
+                '</div>' +
+            '</div>' +
+            '<div class="message-bubble"><p></p><div class="chat-time"></div></div>';
+        message.querySelector('p').textContent = text;
+        message.querySelector('.chat-time').textContent =
+            new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+        chatContainer.appendChild(message);
+        scrollToBottom();
+        return message.querySelector('p');
+    };
+
+    // Parse one "event: ...\ndata: ..." block of the event stream
+    const parseEvent = function(block) {
+        let name = 'message';
+        let data = '';
+        block.split('\n').forEach(function(line) {
+            if (line.startsWith('event: ')) {
+                name = line.slice(7);
+            } else if (line.startsWith('data: ')) {
+                data += line.slice(6);
+            }
+        });
+        return { name: name, payload: data ? JSON.parse(data) : {} };
+    };
+
+    messageForm.addEventListener('submit', function(event) {
+        const text = messageInput.value.trim();
+        if (!text) {
+            return;
+        }
+        event.preventDefault();
+
+        const formData = new FormData(messageForm);
+        addMessage(true, text);
+        messageInput.value = '';
+        submitButton.disabled = true;
+
+        const reply = addMessage(false, '...');
+        let received = '';
+
+        const handleEvent = function(block) {
+            const parsed = parseEvent(block);
+            if (parsed.name === 'chunk') {
+                received += parsed.payload.text;
+                reply.textContent = received;
+                scrollToBottom();
+            } else if (parsed.name === 'error') {
+                reply.textContent = received ? received + ' ' + parsed.payload.message : parsed.payload.message;
+            }
+        };
+
+        fetch(messageForm.dataset.streamUrl, {
+            method: 'POST',
+            body: formData,
+            headers: { 'Accept': 'text/event-stream' }
+        })
+            .then(function(response) {
+                if (!response.ok) {
+                    return response.json().then(function(data) {
+                        throw new Error(data.error || 'The advisor could not answer right now. Please try again.');
+                    });
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                const pump = function() {
+                    return reader.read().then(function(result) {
+                        if (result.done) {
+                            return;
+                        }
+                        buffer += decoder.decode(result.value, { stream: true });
+                        const blocks = buffer.split('\n\n');
+                        buffer = blocks.pop();
+                        blocks.forEach(handleEvent);
+                        return pump();
+                    });
+                };
+                return pump();
+            })
+            .catch(function(error) {
+                reply.textContent = error.message;
+            })
+            .finally(function() {
+                submitButton.disabled = false;
+            });
+    });
+});
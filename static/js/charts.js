@@ -54,6 +54,47 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Activity Chart (Dashboard)
+    const activityCtx = document.getElementById('activityChart');
+    if (activityCtx) {
+        const activityLabels = activityCtx.dataset.labels ? JSON.parse(activityCtx.dataset.labels) : [];
+        const activityData = activityCtx.dataset.values ? JSON.parse(activityCtx.dataset.values) : [];
+        
+        new Chart(activityCtx, {
+            type: 'bar',
+            data: {
+                labels: activityLabels,
+                datasets: [{
+                    label: 'Submissions and Tests',
+                    data: activityData,
+                    backgroundColor: '#6f42c1',
+                    barPercentage: 0.6
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        ticks: {
+                            precision: 0
+                        },
+                        title: {
+                            display: true,
+                            text: 'Activity'
+                        }
+                    }
+                },
+                plugins: {
+                    legend: {
+                        display: false
+                    }
+                }
+            }
+        });
+    }
+
     // Career Match Chart (Career Paths)
     const matchCharts = document.querySelectorAll('.career-match-chart');
     if (matchCharts) {
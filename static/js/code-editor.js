@@ -103,6 +103,37 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Poll for the verdict of a submission that is still being judged
+    const submissionStatus = document.getElementById('submission-status');
+    if (submissionStatus && submissionStatus.dataset.statusUrl) {
+        const statusUrl = submissionStatus.dataset.statusUrl;
+        const verdictElement = submissionStatus.querySelector('.submission-verdict');
+        const metricsElement = submissionStatus.querySelector('.submission-metrics');
+        
+        const pollStatus = function() {
+            fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    if (data.pending) {
+                        setTimeout(pollStatus, 1500);
+                        return;
+                    }
+                    
+                    verdictElement.textContent = data.status;
+                    if (data.runtime !== null) {
+                        metricsElement.innerHTML = '&middot; ' + data.runtime + ' ms &middot; ' + data.memory_used + ' KB';
+                    }
+                    submissionStatus.classList.remove('alert-info');
+                    submissionStatus.classList.add(data.status === 'Accepted' ? 'alert-success' : 'alert-warning');
+                })
+                .catch(function() {
+                    setTimeout(pollStatus, 5000);
+                });
+        };
+        
+        setTimeout(pollStatus, 1000);
+    }
+    
     // Initialize example buttons
     const showExampleButtons = document.querySelectorAll('.show-example-btn');
     if (showExampleButtons) {
@@ -32,6 +32,50 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // "Load more" links on keyset-paginated lists fetch the next page and
+    // add its items to the current list instead of navigating away
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('.load-more');
+        if (!link) {
+            return;
+        }
+        
+        const selector = link.dataset.container;
+        const container = document.querySelector(selector);
+        if (!container) {
+            return;
+        }
+        
+        e.preventDefault();
+        link.classList.add('disabled');
+        
+        fetch(link.href)
+            .then(response => response.text())
+            .then(function(html) {
+                const page = new DOMParser().parseFromString(html, 'text/html');
+                const newContainer = page.querySelector(selector);
+                const items = newContainer ? Array.from(newContainer.children) : [];
+                
+                if (link.dataset.insert === 'prepend') {
+                    container.prepend(...items);
+                } else {
+                    container.append(...items);
+                }
+                
+                // Swap in the link to the following page, if there is one
+                const wrapper = link.closest('.load-more-wrapper') || link;
+                const nextLink = page.querySelector(`.load-more[data-container="${selector}"]`);
+                if (nextLink) {
+                    link.replaceWith(document.importNode(nextLink, true));
+                } else {
+                    wrapper.remove();
+                }
+            })
+            .catch(function() {
+                window.location = link.href;
+            });
+    });
+
     // Flash message auto-dismiss
     const flashMessages = document.querySelectorAll('.alert-dismissible');
     flashMessages.forEach(function(message) {
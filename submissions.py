@@ -0,0 +1,178 @@
+import json
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from app import app, db
+from models import CodingProblem, CodingSolution, JudgeJob
+from sqlalchemy import case, func
+from utils import evaluate_code_solution
+from verdict_cache import get_or_create_code_blob, lookup_verdict, store_verdict, verdict_hash
+from user_stats import record_verdict
+
+PENDING = "Pending"
+ACCEPTED = "Accepted"
+ATTEMPTED = "Attempted"
+JUDGE_ERROR = "Judge Error"
+
+# Best outcome of a user's submissions to one problem
+ProblemProgress = namedtuple('ProblemProgress', ['status', 'attempts'])
+
+# A job left "running" this long was abandoned by a crashed judge worker
+STALE_JOB_AFTER = timedelta(minutes=2)
+MAX_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+def enqueue_submission(user_id, problem, language, code):
+    """Store a solution and queue it for judging. The caller commits.
+
+    Code bodies are deduplicated into CodeBlob rows, and a resubmission of
+    code that was already judged against the same test cases gets its
+    verdict straight from the verdict cache instead of a judge job.
+    """
+    blob = get_or_create_code_blob(code)
+    solution = CodingSolution(
+        user_id=user_id,
+        problem_id=problem.id,
+        language=language,
+        code_blob=blob,
+        status=PENDING
+    )
+    db.session.add(solution)
+    
+    verdict = lookup_verdict(problem, language, verdict_hash(code))
+    if verdict is not None:
+        solution.status = verdict['status']
+        solution.runtime = verdict['runtime']
+        solution.memory_used = verdict['memory_used']
+        record_verdict(solution)
+        return solution
+    
+    db.session.add(JudgeJob(solution=solution))
+    return solution
+
+def _user_solutions(user_id, accepted_only=False):
+    solutions = db.session.query(CodingSolution.id).filter(
+        CodingSolution.user_id == user_id,
+        CodingSolution.problem_id == CodingProblem.id
+    )
+    if accepted_only:
+        solutions = solutions.filter(CodingSolution.status == ACCEPTED)
+    return solutions.exists()
+
+def filter_problems_by_status(problem_query, user_id, status):
+    """Restrict a CodingProblem query to 'solved', 'attempted' or 'unsolved' problems."""
+    if status == 'solved':
+        return problem_query.filter(_user_solutions(user_id, accepted_only=True))
+    if status == 'attempted':
+        return problem_query.filter(_user_solutions(user_id))
+    if status == 'unsolved':
+        return problem_query.filter(~_user_solutions(user_id))
+    return problem_query
+
+def get_problem_progress(user_id, problem_ids):
+    """Return {problem_id: ProblemProgress} for the problems the user has submitted to."""
+    if not problem_ids:
+        return {}
+    rows = db.session.query(
+        CodingSolution.problem_id,
+        func.max(case((CodingSolution.status == ACCEPTED, 1), else_=0)),
+        func.count(CodingSolution.id)
+    ).filter(
+        CodingSolution.user_id == user_id,
+        CodingSolution.problem_id.in_(problem_ids)
+    ).group_by(CodingSolution.problem_id).all()
+    
+    return {
+        problem_id: ProblemProgress(ACCEPTED if solved else ATTEMPTED, attempts)
+        for problem_id, solved, attempts in rows
+    }
+
+def claim_next_job():
+    """Atomically claim the oldest queued (or abandoned) job, or return None.
+
+    An abandoned job that has already used up its attempts probably crashes
+    the worker judging it, so it is failed instead of claimed again.
+    """
+    now = datetime.utcnow()
+    candidates = JudgeJob.query.filter(
+        (JudgeJob.status == 'queued') |
+        ((JudgeJob.status == 'running') & (JudgeJob.started_at < now - STALE_JOB_AFTER))
+    ).order_by(JudgeJob.id).limit(5).all()
+
+    for job in candidates:
+        if job.status == 'running' and job.attempts >= MAX_ATTEMPTS:
+            failed = JudgeJob.query.filter_by(id=job.id, status='running', attempts=job.attempts).update({
+                'status': 'failed',
+                'finished_at': now
+            }, synchronize_session=False)
+            if failed:
+                logger.error("Judge job %s was abandoned %s times; giving up", job.id, job.attempts)
+                CodingSolution.query.filter_by(id=job.solution_id).update(
+                    {'status': JUDGE_ERROR}, synchronize_session=False
+                )
+            db.session.commit()
+            continue
+
+        # Only one worker can move the row out of the state it saw
+        claimed = JudgeJob.query.filter_by(id=job.id, status=job.status, attempts=job.attempts).update({
+            'status': 'running',
+            'started_at': now,
+            'attempts': job.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            db.session.refresh(job)
+            return job
+    return None
+
+def process_job(job):
+    """Judge the solution behind a claimed job and record the verdict."""
+    solution = job.solution
+    try:
+        result = evaluate_code_solution(
+            problem=solution.problem,
+            code=solution.source,
+            language=solution.language
+        )
+    except Exception:
+        logger.exception("Judging solution %s failed", solution.id)
+        if job.attempts >= MAX_ATTEMPTS:
+            solution.status = JUDGE_ERROR
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+        db.session.commit()
+        return
+
+    solution.status = result['status']
+    solution.runtime = result['runtime']
+    solution.memory_used = result['memory_used']
+    if 'cases' in result:
+        solution.case_results = json.dumps(result['cases'])
+    if solution.source is not None:
+        store_verdict(solution.problem, solution.language, verdict_hash(solution.source), result)
+    record_verdict(solution)
+    job.status = 'done'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def run_judge_worker(poll_interval=0.5):
+    """Judge queued submissions forever."""
+    logger.info("Judge worker started")
+    with app.app_context():
+        while True:
+            job = claim_next_job()
+            if job is None:
+                db.session.remove()
+                time.sleep(poll_interval)
+                continue
+            try:
+                process_job(job)
+            except Exception:
+                # The job stays "running" and is retried once it goes stale
+                logger.exception("Judge job %s failed", job.id)
+                db.session.rollback()
+            db.session.remove()
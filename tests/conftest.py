@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# The app connects at import, so it has to be pointed at a throwaway database first
+_database_dir = tempfile.mkdtemp(prefix='career-compass-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_database_dir, 'test.db')
+
+import pytest
+from app import app as flask_app, db
+from commands import seed_sample_data
+from models import (
+    User, Profile, UserStats, Course, Enrollment, CareerPath, CareerGoal, CodingProblem,
+    CodingSolution, AptitudeTest, AptitudeTestResult, AiChatMessage
+)
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        seed_sample_data()
+        db.session.add(Course(code='CS101', title='Introduction to Programming', description='Python basics',
+                              department='CSE', level='Undergraduate'))
+        db.session.commit()
+    yield flask_app
+    shutil.rmtree(_database_dir, ignore_errors=True)
+
+def create_user(username, with_stats=True, is_admin=False):
+    """A user with a profile and some history on every per-user table; returns its id."""
+    user = User(username=username, email='%s@example.com' % username, password_hash='unused', is_admin=is_admin)
+    db.session.add(user)
+    db.session.add(Profile(user=user, skills='Python, SQL', areas_of_interest='AI', languages_known='English'))
+    if with_stats:
+        db.session.add(UserStats(user=user))
+
+    test = AptitudeTest.query.first()
+    problem = CodingProblem.query.first()
+    started = datetime.utcnow() - timedelta(days=3)
+    for day in range(3):
+        at = started + timedelta(days=day)
+        db.session.add(Enrollment(user=user, course=Course.query.first(), created_at=at))
+        db.session.add(CareerGoal(user=user, career_path=CareerPath.query.first(), custom_title='Goal %d' % day, created_at=at))
+        db.session.add(CodingSolution(user=user, problem=problem, language='python', code='pass',
+                                      status='Accepted', runtime=1, memory_used=1, submitted_at=at))
+        db.session.add(AptitudeTestResult(user=user, test=test, score=1, score_percentage=50.0, time_taken=60,
+                                          answers=json.dumps({}), completed_at=at))
+        db.session.add(AiChatMessage(user=user, is_user=True, message='Question %d' % day, created_at=at))
+    db.session.commit()
+    return user.id
+
+@pytest.fixture(scope='session')
+def user_id(app):
+    with app.app_context():
+        # An admin, so the item analysis pages are requested too
+        return create_user('tester', is_admin=True)
+
+def login(app, user_id):
+    """A test client signed in as the user."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
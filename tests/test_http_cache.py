@@ -0,0 +1,24 @@
+from app import db
+from conftest import create_user, login
+from models import Course, Enrollment
+
+def test_courses_etag_follows_only_the_users_own_enrollments(app):
+    with app.app_context():
+        reader, other = create_user('reader'), create_user('enroller')
+        course = Course(code='CS102', title='Data Structures', department='CSE', level='Undergraduate')
+        db.session.add(course)
+        db.session.commit()
+        course_id = course.id
+
+    client = login(app, reader)
+    etag = client.get('/courses').headers['ETag']
+
+    with app.app_context():
+        db.session.add(Enrollment(user_id=other, course_id=course_id, status='In Progress'))
+        db.session.commit()
+    assert client.get('/courses', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.add(Enrollment(user_id=reader, course_id=course_id, status='In Progress'))
+        db.session.commit()
+    assert client.get('/courses', headers={'If-None-Match': etag}).status_code == 200
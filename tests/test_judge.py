@@ -0,0 +1,73 @@
+import os
+import pytest
+import judge
+from judge import ExecutionPool, JudgeUnavailable
+from judge_sandbox import ACCEPTED, WRONG_ANSWER, RUNTIME_ERROR
+
+TEST_CASES = [
+    {"input": {"a": 1, "b": 2}, "output": 3},
+    {"input": {"a": -4, "b": 4}, "output": 0},
+]
+
+# Looks through the judge's frames for the expected output and returns it
+READS_EXPECTED = '''
+import sys
+def add(a, b):
+    frame = sys._getframe(1)
+    while frame is not None:
+        if 'expected' in frame.f_locals:
+            return frame.f_locals['expected']
+        frame = frame.f_back
+    return None
+'''
+
+# Writes a reply straight to the protocol pipe
+FORGED_REPLY = '''
+import sys
+def add(a, b):
+    frame = sys._getframe(1)
+    while frame is not None:
+        if 'send' in frame.f_locals:
+            frame.f_locals['send'](%s)
+        frame = frame.f_back
+    return None
+'''
+FORGES_REPLY = FORGED_REPLY % '"case", True, 0'
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Workers may drop to JUDGE_USER, which cannot execute an interpreter under /root
+    monkeypatch.setattr(judge, 'JUDGE_PYTHON', os.environ.get('JUDGE_PYTHON', '/usr/bin/python3'))
+    monkeypatch.setattr(judge, 'JUDGE_ALLOW_UNISOLATED', True)
+    try:
+        pool = ExecutionPool(size=1)
+    except JudgeUnavailable as e:
+        pytest.skip(str(e))
+    yield pool
+    pool.shutdown()
+
+def test_correct_and_wrong_solutions(pool):
+    assert pool.run('def add(a, b):\n    return a + b\n', TEST_CASES, 'add')['status'] == ACCEPTED
+    assert pool.run('def add(a, b):\n    return a - b\n', TEST_CASES, 'add')['status'] == WRONG_ANSWER
+
+@pytest.mark.parametrize('code', [READS_EXPECTED, FORGES_REPLY], ids=['reads_expected', 'forges_reply'])
+def test_solution_cannot_judge_itself(pool, code):
+    verdict = pool.run(code, TEST_CASES, 'add')
+    assert verdict['status'] != ACCEPTED
+    assert not any(case['passed'] for case in verdict['cases'])
+
+@pytest.mark.parametrize('reply', ['"case", True, "x"', '"case", 3, True', '"finish", "foo"',
+                                   '"error", "Accepted", 0', '"ready"'])
+def test_malformed_reply_is_a_runtime_error(pool, reply):
+    assert pool.run(FORGED_REPLY % reply, TEST_CASES, 'add')['status'] == RUNTIME_ERROR
+
+def test_pool_recovers_from_a_failed_worker_start(pool, monkeypatch):
+    spawn = pool._spawn
+    def fail():
+        raise OSError('no processes left')
+    monkeypatch.setattr(pool, '_spawn', fail)
+    assert pool.run('def add(a, b):\n    return a + b\n', TEST_CASES, 'add')['status'] == ACCEPTED
+
+    monkeypatch.setattr(pool, '_spawn', spawn)
+    assert pool.run('def add(a, b):\n    return a + b\n', TEST_CASES, 'add')['status'] == ACCEPTED
+    assert pool._idle.qsize() == pool.size
@@ -0,0 +1,31 @@
+import pytest
+from app import db
+from conftest import create_user, login
+from models import UserStats
+from user_cache import invalidate_user
+
+# Pages whose views declare their own query budget
+BUDGETED_PAGES = ['/dashboard', '/courses', '/aptitude-tests']
+
+# Under app.testing a page over its budget raises QueryBudgetExceeded, failing the request
+
+@pytest.mark.parametrize('url', BUDGETED_PAGES)
+def test_budgeted_page(app, user_id, url):
+    client = login(app, user_id)
+    # Once with the user loaded from the database, once from the per-process cache
+    invalidate_user(user_id)
+    assert client.get(url).status_code == 200
+    assert client.get(url).status_code == 200
+
+def test_budgeted_pages_for_user_without_stats(app):
+    """Users from before the stats table get their row built on first visit, outside the budget."""
+    with app.app_context():
+        legacy_id = create_user('legacy', with_stats=False)
+
+    client = login(app, legacy_id)
+    for url in BUDGETED_PAGES:
+        assert client.get(url).status_code == 200, url
+
+    with app.app_context():
+        stats = db.session.get(UserStats, legacy_id)
+        assert (stats.submissions, stats.accepted_submissions, stats.tests_taken) == (3, 3, 3)
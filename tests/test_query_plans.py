@@ -0,0 +1,31 @@
+from conftest import login
+from models import AptitudeTestResult, CodingSolution
+from query_plans import route_urls, capture_route_statements, explain, full_scans
+
+def page_urls(app, user_id):
+    """Every GET page without URL arguments, plus the ones that take the user's rows."""
+    result = AptitudeTestResult.query.filter_by(user_id=user_id).first()
+    solution = CodingSolution.query.filter_by(user_id=user_id).first()
+    return route_urls(app) + [
+        '/problem/%d' % solution.problem_id,
+        '/solution/%d/status' % solution.id,
+        '/take-test/%d' % result.test_id,
+        '/test-results/%d' % result.id,
+    ]
+
+def test_pages_render(app, user_id):
+    with app.app_context():
+        urls = page_urls(app, user_id)
+    for url in urls:
+        # Signed-in users are redirected away from the sign-in pages
+        assert login(app, user_id).get(url).status_code in (200, 302), url
+
+def test_pages_do_not_scan_history_tables(app, user_id):
+    with app.app_context():
+        statements = capture_route_statements(app, user_id, page_urls(app, user_id))
+        scans = {}
+        for statement, (url, parameters) in statements.items():
+            scanned = full_scans(explain(statement, parameters))
+            if scanned:
+                scans['%s: %s' % (url, ' '.join(statement.split()))] = scanned
+    assert scans == {}
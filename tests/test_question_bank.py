@@ -0,0 +1,43 @@
+import json
+from app import db
+from conftest import login
+from item_analysis import update_item_statistics, item_report
+from models import AptitudeTest, AptitudeQuestion, AptitudeTestResult
+from question_bank import get_question_bank, UNANSWERED
+
+def add_question(test, text, correct_option):
+    question = AptitudeQuestion(test=test, question_text=text, options=json.dumps(['a', 'b', 'c']),
+                                correct_option=correct_option)
+    db.session.add(question)
+    db.session.commit()
+    return question.id
+
+def test_answers_follow_the_questions_after_the_test_changes(app, user_id):
+    with app.app_context():
+        test = AptitudeTest(category='Layout', total_questions=2, passing_score=50)
+        db.session.add(test)
+        first = add_question(test, 'First', 0)
+        second = add_question(test, 'Second', 1)
+        test_id = test.id
+
+    response = login(app, user_id).post('/submit-test/%d' % test_id, data={'q%d' % first: 0, 'q%d' % second: 2})
+    assert response.status_code == 302
+
+    with app.app_context():
+        result = AptitudeTestResult.query.filter_by(test_id=test_id).one()
+        assert result.question_ids == '%d,%d' % (first, second)
+
+        # The first question is replaced, so the stored bytes no longer line up by position
+        db.session.delete(db.session.get(AptitudeQuestion, first))
+        db.session.commit()
+        third = add_question(db.session.get(AptitudeTest, test_id), 'Third', 2)
+
+        bank = get_question_bank(test_id)
+        assert [question.id for question in bank.questions] == [second, third]
+        assert bank.selected_answers(result) == [2, UNANSWERED]
+
+        update_item_statistics(test_id=test_id, rebuild=True)
+        reports, _, total = item_report(test_id)
+        assert total == 1
+        assert [option.count for option in reports[0].options] == [0, 0, 1]
+        assert (reports[0].p_value, reports[1].unanswered) == (0, 1)
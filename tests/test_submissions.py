@@ -0,0 +1,38 @@
+from datetime import datetime
+import submissions
+from app import db
+from conftest import login
+from models import CodingProblem, CodingSolution, JudgeJob
+from submissions import claim_next_job, enqueue_submission, process_job, JUDGE_ERROR, MAX_ATTEMPTS, STALE_JOB_AFTER
+
+def test_abandoned_job_is_failed_after_its_last_attempt(app, user_id):
+    with app.app_context():
+        solution = CodingSolution(user_id=user_id, problem=CodingProblem.query.first(), language='python',
+                                  code='pass', status='Pending')
+        # Its worker died on every attempt
+        job = JudgeJob(solution=solution, status='running', attempts=MAX_ATTEMPTS,
+                       started_at=datetime.utcnow() - STALE_JOB_AFTER * 2)
+        db.session.add_all([solution, job])
+        db.session.commit()
+        job_id, solution_id = job.id, solution.id
+
+        claimed = claim_next_job()
+        assert claimed is None or claimed.id != job_id
+        db.session.expire_all()
+        assert db.session.get(JudgeJob, job_id).status == 'failed'
+        assert db.session.get(CodingSolution, solution_id).status == JUDGE_ERROR
+
+def test_case_timings_are_stored_with_the_solution(app, user_id, monkeypatch):
+    cases = [{"index": 0, "passed": True, "time_ms": 0.25}, {"index": 1, "passed": False, "time_ms": 1.5}]
+    monkeypatch.setattr(submissions, 'evaluate_code_solution', lambda **kwargs: {
+        "status": "Wrong Answer", "runtime": 2, "memory_used": 0, "cases": cases
+    })
+    with app.app_context():
+        solution = enqueue_submission(user_id, CodingProblem.query.first(), 'python', 'def timed(): pass')
+        db.session.commit()
+        process_job(solution.judge_job)
+        solution_id = solution.id
+
+    response = login(app, user_id).get('/solution/%d/status' % solution_id)
+    assert response.json['status'] == 'Wrong Answer'
+    assert response.json['cases'] == cases
@@ -0,0 +1,20 @@
+from app import db
+from conftest import create_user
+from models import UserStats
+from user_stats import get_user_stats, record_submission
+
+def test_submission_counts_are_not_lost_to_a_concurrent_request(app):
+    with app.app_context():
+        user_id = create_user('concurrent')
+        stats = get_user_stats(user_id)
+        before = stats.submissions
+
+        # Another request counts a submission after this one loaded the row
+        with db.engine.begin() as conn:
+            conn.execute(db.update(UserStats).where(UserStats.user_id == user_id).values(
+                submissions=UserStats.submissions + 1
+            ))
+
+        record_submission(user_id)
+        db.session.commit()
+        assert db.session.get(UserStats, user_id).submissions == before + 2
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from app import db
+from models import User, Profile
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Short enough that edits made through another worker show up quickly
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire after a fixed time."""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                # Drop expired entries first, then the oldest ones
+                now = time.monotonic()
+                for stale in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                    del self._entries[stale]
+                while len(self._entries) >= self.maxsize:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_user_cache = TTLCache(USER_CACHE_TTL, USER_CACHE_SIZE)
+
+def _snapshot(obj):
+    """Plain column values of a loaded model instance."""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+
+def _attach(model, values):
+    """Rebuild a persistent instance from a snapshot without querying the database."""
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.session.merge(obj, load=False)
+
+def load_cached_user(user_id):
+    """Return the User (with profile) for user_id, from the cache when fresh.
+
+    On a miss the user and profile are fetched in a single joined query.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is None:
+        user = db.session.get(User, user_id, options=[joinedload(User.profile)])
+        if user is None:
+            return None
+        _user_cache.set(user_id, (_snapshot(user), _snapshot(user.profile) if user.profile else None))
+        return user
+
+    user_values, profile_values = cached
+    user = _attach(User, user_values)
+    if 'profile' not in inspect(user).dict:
+        profile = _attach(Profile, profile_values) if profile_values else None
+        set_committed_value(user, 'profile', profile)
+        if profile is not None:
+            set_committed_value(profile, 'user', user)
+    return user
+
+def invalidate_user(user_id):
+    """Forget the cached copy of a user after their account or profile changed."""
+    _user_cache.delete(user_id)
@@ -0,0 +1,166 @@
+import json
+from datetime import datetime, timedelta
+from app import db
+from models import UserStats, CodingSolution, CodingProblem, AptitudeTestResult, AptitudeTest
+from query_budget import uncounted
+
+# How many days of activity history the progress chart can show
+ACTIVITY_DAYS = 30
+
+DIFFICULTY_COLUMNS = {
+    'Easy': 'easy_solved',
+    'Medium': 'medium_solved',
+    'Hard': 'hard_solved',
+}
+
+def _today():
+    return datetime.utcnow().date()
+
+def _load(text):
+    return json.loads(text) if text else {}
+
+def _record_activity(stats, day=None):
+    """Count one activity on `day` and extend or restart the streak."""
+    day = day or _today()
+    activity = _load(stats.activity)
+    activity[day.isoformat()] = activity.get(day.isoformat(), 0) + 1
+    cutoff = (day - timedelta(days=ACTIVITY_DAYS - 1)).isoformat()
+    stats.activity = json.dumps({d: n for d, n in activity.items() if d >= cutoff})
+
+    if stats.last_active_date == day:
+        return
+    if stats.last_active_date == day - timedelta(days=1):
+        stats.current_streak = (stats.current_streak or 0) + 1
+    elif stats.last_active_date is None or stats.last_active_date < day:
+        stats.current_streak = 1
+    else:
+        return
+    stats.last_active_date = day
+    stats.longest_streak = max(stats.longest_streak or 0, stats.current_streak)
+
+def _add_test_score(stats, test_id, category, percentage):
+    best_scores = _load(stats.best_scores)
+    best = best_scores.get(str(test_id))
+    if best is None or percentage > best['percentage']:
+        best_scores[str(test_id)] = {'category': category, 'percentage': round(percentage, 1)}
+    stats.best_scores = json.dumps(best_scores)
+
+def rebuild_user_stats(user_id):
+    """Compute a user's stats row from their full history. Only needed once per user."""
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+    db.session.add(stats)
+
+    stats.submissions = CodingSolution.query.filter_by(user_id=user_id).count()
+    stats.accepted_submissions = CodingSolution.query.filter_by(user_id=user_id, status='Accepted').count()
+    solved = db.session.query(CodingProblem.difficulty, db.func.count(db.distinct(CodingProblem.id))).join(
+        CodingSolution, CodingSolution.problem_id == CodingProblem.id
+    ).filter(
+        CodingSolution.user_id == user_id, CodingSolution.status == 'Accepted'
+    ).group_by(CodingProblem.difficulty).all()
+    for column in DIFFICULTY_COLUMNS.values():
+        setattr(stats, column, 0)
+    for difficulty, count in solved:
+        if difficulty in DIFFICULTY_COLUMNS:
+            setattr(stats, DIFFICULTY_COLUMNS[difficulty], count)
+
+    stats.tests_taken = 0
+    stats.best_scores = None
+    for result, category in db.session.query(AptitudeTestResult, AptitudeTest.category).join(
+        AptitudeTest, AptitudeTest.id == AptitudeTestResult.test_id
+    ).filter(AptitudeTestResult.user_id == user_id):
+        stats.tests_taken += 1
+        _add_test_score(stats, result.test_id, category, result.score_percentage or 0)
+
+    stats.activity = None
+    stats.current_streak = stats.longest_streak = 0
+    stats.last_active_date = None
+    since = datetime.combine(_today() - timedelta(days=ACTIVITY_DAYS - 1), datetime.min.time())
+    events = [s for (s,) in db.session.query(CodingSolution.submitted_at).filter(
+        CodingSolution.user_id == user_id, CodingSolution.submitted_at >= since)]
+    events += [c for (c,) in db.session.query(AptitudeTestResult.completed_at).filter(
+        AptitudeTestResult.user_id == user_id, AptitudeTestResult.completed_at >= since)]
+    for moment in sorted(event for event in events if event):
+        _record_activity(stats, moment.date())
+    return stats
+
+def get_user_stats(user_id):
+    """Return the user's stats row, building it from history (and committing) the first time.
+
+    Record new activity only after this, so it is not counted twice.
+    """
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        # Users from before the stats table pay for this once; it is not the page's own cost
+        with uncounted():
+            stats = rebuild_user_stats(user_id)
+            _commit_without_expiring()
+    return stats
+
+def _commit_without_expiring():
+    """Commit, keeping loaded objects as they are so the rest of the page need not reload them."""
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+def _locked_stats(user_id):
+    """The user's stats row, reloaded and locked until the caller commits.
+
+    The JSON and streak fields are rewritten from their current values, so
+    concurrent requests for the same user must wait their turn.
+    """
+    get_user_stats(user_id)
+    return UserStats.query.filter_by(user_id=user_id).populate_existing().with_for_update().one()
+
+def _increment(stats, column):
+    """Add one to a counter in SQL at flush, so concurrent increments are never lost."""
+    setattr(stats, column, db.func.coalesce(getattr(UserStats, column), 0) + 1)
+
+def record_submission(user_id):
+    """Count a new coding submission, before it is added to the session. The caller commits."""
+    stats = _locked_stats(user_id)
+    _increment(stats, 'submissions')
+    _record_activity(stats)
+
+def record_verdict(solution):
+    """Count an accepted verdict, and a newly solved problem if it is the first. The caller commits."""
+    if solution.status != 'Accepted':
+        return
+    db.session.flush()
+    stats = _locked_stats(solution.user_id)
+    _increment(stats, 'accepted_submissions')
+
+    already_solved = db.session.query(CodingSolution.query.filter(
+        CodingSolution.user_id == solution.user_id,
+        CodingSolution.problem_id == solution.problem_id,
+        CodingSolution.status == 'Accepted',
+        CodingSolution.id != solution.id
+    ).exists()).scalar()
+    column = DIFFICULTY_COLUMNS.get(solution.problem.difficulty)
+    if not already_solved and column:
+        _increment(stats, column)
+
+def record_test_result(user_id, test, score_percentage):
+    """Count a completed test, before its result is added to the session. The caller commits."""
+    stats = _locked_stats(user_id)
+    _increment(stats, 'tests_taken')
+    _add_test_score(stats, test.id, test.category, score_percentage)
+    _record_activity(stats)
+
+def activity_series(stats, days=14):
+    """(labels, counts) of activity over the last `days` days, oldest first."""
+    activity = _load(stats.activity)
+    today = _today()
+    dates = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    return [d.strftime('%b %d') for d in dates], [activity.get(d.isoformat(), 0) for d in dates]
+
+def category_scores(stats):
+    """(categories, best percentages) across the tests the user has taken."""
+    best = {}
+    for entry in _load(stats.best_scores).values():
+        best[entry['category']] = max(best.get(entry['category'], 0), entry['percentage'])
+    categories = sorted(best)
+    return categories, [best[category] for category in categories]
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from app import db
+from models import CodeBlob, JudgeVerdict
+from sqlalchemy.exc import IntegrityError
+
+VERDICT_CACHE_SIZE = int(os.environ.get("VERDICT_CACHE_SIZE", 2048))
+
+# Verdicts that depend only on the code and the test cases. Time and memory
+# limit verdicts can depend on machine load, so those are always re-judged.
+CACHEABLE_STATUSES = {"Accepted", "Wrong Answer", "Runtime Error", "Syntax Error"}
+
+def normalize_code(code):
+    """Normalize line endings and trailing whitespace so cosmetic edits hash the same.
+
+    Only used to key verdicts; the code that is stored and run is the code as submitted.
+    """
+    lines = [line.rstrip() for line in code.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    return '\n'.join(lines).strip('\n') + '\n'
+
+def hash_code(code):
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+def verdict_hash(code):
+    """Hash identifying code for the verdict cache, insensitive to cosmetic edits."""
+    return hash_code(normalize_code(code))
+
+class VerdictCache:
+    """In-process LRU of verdicts keyed by (problem_id, test_cases_version, language, code_hash)."""
+
+    def __init__(self, maxsize=VERDICT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is not None:
+                self._entries.move_to_end(key)
+            return verdict
+
+    def put(self, key, verdict):
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_problem(self, problem_id):
+        """Drop every cached verdict for a problem whose test cases changed."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == problem_id]:
+                del self._entries[key]
+
+verdict_cache = VerdictCache()
+
+def get_or_create_code_blob(code):
+    """Return the CodeBlob holding exactly this code, storing each distinct body once."""
+    digest = hash_code(code)
+
+    blob = CodeBlob.query.filter_by(hash=digest).first()
+    if blob is not None:
+        return blob
+
+    blob = CodeBlob(hash=digest, code=code)
+    try:
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        # Another request stored the same code first
+        blob = CodeBlob.query.filter_by(hash=digest).first()
+    return blob
+
+def _cache_key(problem, language, code_hash):
+    return (problem.id, problem.test_cases_version, language, code_hash)
+
+def lookup_verdict(problem, language, code_hash):
+    """Return a cached verdict dict for identical code, or None."""
+    key = _cache_key(problem, language, code_hash)
+    verdict = verdict_cache.get(key)
+    if verdict is not None:
+        return verdict
+
+    # Fall back to verdicts recorded by other workers
+    row = JudgeVerdict.query.filter_by(
+        problem_id=problem.id,
+        test_cases_version=problem.test_cases_version,
+        language=language,
+        code_hash=code_hash
+    ).first()
+    if row is None:
+        return None
+
+    verdict = {"status": row.status, "runtime": row.runtime, "memory_used": row.memory_used}
+    verdict_cache.put(key, verdict)
+    return verdict
+
+def store_verdict(problem, language, code_hash, result):
+    """Remember a verdict for later identical submissions. The caller commits."""
+    if result['status'] not in CACHEABLE_STATUSES:
+        return
+
+    verdict = {"status": result['status'], "runtime": result['runtime'], "memory_used": result['memory_used']}
+    verdict_cache.put(_cache_key(problem, language, code_hash), verdict)
+
+    exists = JudgeVerdict.query.filter_by(
+        problem_id=problem.id,
+        test_cases_version=problem.test_cases_version,
+        language=language,
+        code_hash=code_hash
+    ).first()
+    if exists is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(JudgeVerdict(
+                    problem_id=problem.id,
+                    test_cases_version=problem.test_cases_version,
+                    language=language,
+                    code_hash=code_hash,
+                    **verdict
+                ))
+        except IntegrityError:
+            pass